@@ -1,24 +1,42 @@
 import pygame
-import random
 from constants import *
 from circleshape import CircleShape
+from views import CircleView
+import log
 
 class Asteroid(CircleShape):
+    __slots__ = ()
+    outline = False  # draw just the outline, cheaper (set by the quality governor)
+    draw_count = 0   # draw() calls of all asteroids, for the occasional debug line
+    rng = None       # the active world's splitter stream, set by World.activate
+
     def __init__(self, x, y, radius):
         super().__init__(x, y, radius)
         self.velocity = pygame.Vector2(0, 0)
 
-    def draw(self, screen):
-        # Print debug info occasionally
-        if hasattr(self, 'draw_counter'):
-            self.draw_counter += 1
-            if self.draw_counter % 60 == 0:
-                print(f"Drawing asteroid at position: {self.position}")
-        else:
-            self.draw_counter = 0
+    def reset(self, x, y, radius):
+        super().reset(x, y, radius)
+        self.velocity = pygame.Vector2(0, 0)
+
+    def draw(self, screen, alpha=1.0):
+        # Log debug info occasionally
+        if log.enabled(log.DEBUG):
+            Asteroid.draw_count += 1
+            if Asteroid.draw_count % 60 == 0:
+                log.debug("Drawing asteroid at position: %s", self.position)
             
         # Draw the asteroid - make it more visible with a filled circle
-        pygame.draw.circle(screen, ("brown"), (int(self.position.x), int(self.position.y)), self.radius)
+        position = self.render_position(alpha)
+        pygame.draw.circle(screen, ("brown"), (int(position.x), int(position.y)), self.radius, 2 if self.outline else 0)
+
+    def blit_item(self, cache, alpha=1.0):
+        surface, offset = cache.circle("brown", self.radius, 2 if self.outline else 0)
+        position = self.render_position(alpha) * cache.scale
+        return surface, (int(position.x) - offset, int(position.y) - offset)
+
+    def view(self, alpha=1.0):
+        position = self.render_position(alpha)
+        return CircleView(position.x, position.y, self.radius, "brown", 2 if self.outline else 0)
 
     def update(self, dt):
         self.position += self.velocity * dt
@@ -33,26 +51,31 @@ class Asteroid(CircleShape):
             self.position.y = 0
     
     def split(self):
+        """Kill this asteroid and return the list of fragments it broke into"""
+        children = []
         # Only split if the asteroid is larger than the minimum size
         if self.radius > ASTEROID_MIN_RADIUS:
             # Calculate new radius for child asteroids
             new_radius = self.radius // 2  # Integer division to ensure smaller radius
             
             # Create random angle for splitting
-            angle = random.uniform(20, 50)
+            angle = self.rng.uniform(20, 50)
             
             # Calculate velocities for the two new asteroids
             velocity1 = self.velocity.rotate(angle) * 1.2
             velocity2 = self.velocity.rotate(-angle) * 1.2
             
-            # Create two new smaller asteroids
-            asteroid1 = Asteroid(self.position.x, self.position.y, new_radius)
+            # Create two new smaller asteroids of the same type as this one
+            asteroid1 = type(self).create(self.position.x, self.position.y, new_radius)
             asteroid1.velocity = velocity1
             
-            asteroid2 = Asteroid(self.position.x, self.position.y, new_radius)
+            asteroid2 = type(self).create(self.position.x, self.position.y, new_radius)
             asteroid2.velocity = velocity2
             
-            print(f"Split asteroid at position {self.position} into two with radius {new_radius}")
+            children = [asteroid1, asteroid2]
+            
+            log.debug("Split asteroid at position %s into two with radius %s", self.position, new_radius)
             
         # Remove the original asteroid
-        self.kill()
\ No newline at end of file
+        self.kill()
+        return children
@@ -1,10 +1,14 @@
 import pygame
-import random
 from asteroid import Asteroid
+from registry import Entity
 from constants import *
+import log
 
 
-class AsteroidField(pygame.sprite.Sprite):
+class AsteroidField(Entity):
+    asteroid_type = Asteroid  # class used for new asteroids, replaced in world.py
+    rng = None                # the active world's spawner stream, set by World.activate
+
     edges = [
         [
             pygame.Vector2(1, 0),
@@ -29,28 +33,38 @@ class AsteroidField(pygame.sprite.Sprite):
     ]
 
     def __init__(self):
-        pygame.sprite.Sprite.__init__(self, self.containers)
-        self.spawn_timer = 0.0
+        super().__init__()
+        self.spawn_interval = ASTEROID_SPAWN_RATE  # raised by the quality governor under load
+        self.spawning = True                       # False pauses spawning
+        self.spawn_timer = None                    # Timer of the next spawn, see start()
+
+    def start(self):
+        """Schedule the first spawn on the active world's timer wheel (called by World.reset)"""
+        self.spawn_timer = self.timers.schedule(self.spawn_interval, self.spawn_due)
 
     def spawn(self, radius, position, velocity):
-        # Create the Asteroid - this will automatically add it to the sprite groups
-        # because Asteroid.containers is defined in main.py
-        asteroid = Asteroid(position.x, position.y, radius)
+        # Create the Asteroid - this will automatically add it to the active world's
+        # registry (see World.activate)
+        asteroid = self.asteroid_type.create(position.x, position.y, radius)
         asteroid.velocity = velocity
-        print(f"Created asteroid with position {asteroid.position} and groups: {asteroid.groups()}")
+        if log.enabled(log.DEBUG):
+            log.debug("Created asteroid with position %s in row %s", asteroid.position, asteroid.row)
         return asteroid
 
-    def update(self, dt):
-        self.spawn_timer += dt
-        if self.spawn_timer > ASTEROID_SPAWN_RATE:
-            self.spawn_timer = 0
-
-            # spawn a new asteroid at a random edge
-            edge = random.choice(self.edges)
-            speed = random.randint(40, 100)
-            velocity = edge[0] * speed
-            velocity = velocity.rotate(random.randint(-30, 30))
-            position = edge[1](random.uniform(0, 1))
-            kind = random.randint(1, ASTEROID_KINDS)
-            asteroid = self.spawn(ASTEROID_MIN_RADIUS * kind, position, velocity)
-            print(f"Spawned asteroid at position {position} with velocity {velocity}")
\ No newline at end of file
+    def spawn_due(self):
+        # Next one first, counted from now (the tick this one was due on), so
+        # a long frame catches up on every spawn it covered
+        self.spawn_timer = self.timers.schedule(self.spawn_interval, self.spawn_due)
+        if not self.spawning:
+            return
+
+        # spawn a new asteroid at a random edge
+        rng = self.rng
+        edge = rng.choice(self.edges)
+        speed = rng.randint(40, 100)
+        velocity = edge[0] * speed
+        velocity = velocity.rotate(rng.randint(-30, 30))
+        position = edge[1](rng.uniform(0, 1))
+        kind = rng.randint(1, ASTEROID_KINDS)
+        asteroid = self.spawn(ASTEROID_MIN_RADIUS * kind, position, velocity)
+        log.debug("Spawned asteroid at position %s with velocity %s", position, velocity)
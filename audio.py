@@ -0,0 +1,169 @@
+"""Sound events for the game.
+
+Gameplay code never touches the mixer, it posts named events:
+
+    audio.post(audio.ROCK_BREAK)
+
+and the game loop calls audio.flush() once per frame. The installed
+backend decides what that costs. NullAudio, the default, ignores
+everything, so headless runs, batch games and the server pay one no-op
+call per event. SoundManager plays them. It merges repeats of an event
+within a frame into one play, and hands out a fixed pool of mixer
+channels by priority (see SOUND_EVENTS). When every channel is busy, a
+new sound takes the channel of the oldest, lowest-priority sound, or is
+dropped if everything playing outranks it.
+"""
+import threading
+import time
+import pygame
+from constants import *
+import audiopack
+import log
+
+LASER = "laser"
+ROCK_BREAK = "rock_break"
+DEATH = "death"
+LOSE = "lose"
+
+
+class NullAudio:
+    """Plays nothing and loads nothing"""
+    def __init__(self):
+        self.ready = threading.Event()
+        self.ready.set()
+        self.load_time = None
+
+    def start(self):
+        pass
+
+    def post(self, event):
+        pass
+
+    def flush(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class SoundManager:
+    """Initializes the mixer and loads the sounds on a background thread, then plays events
+
+    Events posted before loading has finished (or when there is no usable
+    audio device) are dropped, so the game can start without waiting.
+    """
+    def __init__(self, events=SOUND_EVENTS, voices=SOUND_VOICES):
+        self.events = events
+        self.voice_count = voices
+        self.sounds = {}            # event -> Sound, filled by the loader thread
+        self.voices = []            # mixer channels
+        self.playing = []           # per voice: (priority, start time, event) of its last sound
+        self.pending = set()        # events posted this frame
+        self.ready = threading.Event()
+        self.load_time = None       # seconds the thread took, set once ready
+        self.thread = None
+        self.posted = 0
+        self.played = 0
+        self.stolen = 0             # sounds cut off for a higher (or equal) priority one
+        self.dropped = 0            # events with no voice to play on
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="audio-loader", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self.load()
+        finally:
+            self.load_time = time.perf_counter() - start
+            self.ready.set()
+
+    def load(self):
+        # Try each mixer setting in turn, but continue without sound if all fail
+        first_error = None
+        for settings in MIXER_SETTINGS:
+            try:
+                pygame.mixer.init(*settings)
+                pygame.mixer.set_num_channels(self.voice_count)
+                voices = [pygame.mixer.Channel(index) for index in range(self.voice_count)]
+
+                # Decoded sounds come from the pre-built pack (see audiopack.py)
+                sounds = audiopack.load_sounds()
+                for sound in sounds.values():
+                    sound.set_volume(SOUND_VOLUME)
+            except pygame.error as e:
+                first_error = first_error or e
+                pygame.mixer.quit()
+                continue
+
+            self.voices = voices
+            self.playing = [(0, 0.0, None)] * len(voices)
+            self.sounds = {event: sounds[name] for event, (name, _, _) in self.events.items()}
+            log.info("Sound initialized with %s", pygame.mixer.get_init())
+            return
+
+        log.warning("Sound could not be initialized: %s", first_error)
+        log.warning("Game will continue without sound.")
+
+    def post(self, event):
+        self.pending.add(event)
+        self.posted += 1
+
+    def flush(self):
+        """Play this frame's events, highest priority first"""
+        if not self.pending:
+            return
+        pending = self.pending
+        self.pending = set()
+        if not self.sounds:
+            self.dropped += len(pending)
+            return
+        now = time.perf_counter()
+        for event in sorted(pending, key=lambda event: -self.events[event][1]):
+            _, priority, max_voices = self.events[event]
+            voice = self.pick_voice(event, priority, max_voices)
+            if voice is None:
+                self.dropped += 1
+                continue
+            self.voices[voice].play(self.sounds[event])
+            self.playing[voice] = (priority, now, event)
+            self.played += 1
+
+    def pick_voice(self, event, priority, max_voices):
+        """Index of the channel to play on, or None"""
+        busy = [voice.get_busy() for voice in self.voices]
+        # At its voice limit the event restarts its own oldest voice
+        own = [index for index, playing in enumerate(self.playing) if busy[index] and playing[2] == event]
+        if len(own) >= max_voices:
+            self.stolen += 1
+            return min(own, key=lambda index: self.playing[index][1])
+        for index, is_busy in enumerate(busy):
+            if not is_busy:
+                return index
+        # Every voice is busy: take the oldest of the lowest priority, unless it outranks us
+        index = min(range(len(self.voices)), key=lambda index: self.playing[index][:2])
+        if self.playing[index][0] > priority:
+            return None
+        self.stolen += 1
+        return index
+
+    def stats(self):
+        return {"posted": self.posted, "played": self.played, "stolen": self.stolen, "dropped": self.dropped}
+
+
+# The backend every post() goes to, replaced by install()
+backend = NullAudio()
+
+
+def install(new_backend):
+    global backend
+    backend = new_backend
+
+
+def post(event):
+    backend.post(event)
+
+
+def flush():
+    backend.flush()
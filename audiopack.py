@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Pre-decoded sound packs, so startup doesn't decode OGG/MP3 files every time.
+
+A pack holds the raw PCM of every file in SOUND_FILES for one mixer
+format (frequency, sample size, channels), one pack file per format:
+
+    magic (8 bytes) | header length (4 bytes) | JSON header | PCM data
+
+The header records each source file's size and modification time. When a
+source file changes (or pygame does), the pack is rebuilt the next time
+it is loaded. At runtime the pack is memory-mapped and each sound is made
+from a slice of the map with Sound(buffer=...), so no decoding and no
+intermediate bytes objects (the mixer still copies the samples once).
+
+Build the packs ahead of time with:
+
+    python audiopack.py
+"""
+import os
+
+if __name__ == "__main__":
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import json
+import mmap
+import struct
+import pygame
+from constants import *
+import log
+
+MAGIC = b"LAZPACK1"
+HEADER_LENGTH = struct.Struct("<I")
+
+
+def pack_path(mixer_format):
+    frequency, size, channels = mixer_format
+    return os.path.join(SOUND_PACK_DIR, f"sounds_{frequency}_{size}_{channels}.pcm")
+
+
+def source_info(name):
+    stat = os.stat(os.path.join(SOUND_DIR, name))
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def build_pack(mixer_format=None):
+    """Decode every sound with the current mixer and write the pack, returns its path"""
+    mixer_format = mixer_format or pygame.mixer.get_init()
+    entries = {}
+    chunks = []
+    offset = 0
+    for name in SOUND_FILES:
+        raw = pygame.mixer.Sound(os.path.join(SOUND_DIR, name)).get_raw()
+        entries[name] = {"offset": offset, "length": len(raw), "source": source_info(name)}
+        chunks.append(raw)
+        offset += len(raw)
+    header = json.dumps({
+        "format": list(mixer_format),
+        "pygame": pygame.version.ver,
+        "sounds": entries,
+    }).encode()
+
+    path = pack_path(mixer_format)
+    os.makedirs(SOUND_PACK_DIR, exist_ok=True)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(temporary, path)  # never leave a half-written pack behind
+    return path
+
+
+def read_header(data):
+    if data[:len(MAGIC)] != MAGIC:
+        return None, 0
+    start = len(MAGIC) + HEADER_LENGTH.size
+    (length,) = HEADER_LENGTH.unpack_from(data, len(MAGIC))
+    return json.loads(bytes(data[start:start + length])), start + length
+
+
+def is_current(header, mixer_format):
+    if header is None or header["format"] != list(mixer_format) or header["pygame"] != pygame.version.ver:
+        return False
+    for name in SOUND_FILES:
+        entry = header["sounds"].get(name)
+        if entry is None or entry["source"] != source_info(name):
+            return False
+    return True
+
+
+def load_pack(path, mixer_format):
+    """Sounds from an up-to-date pack, or None if the pack is missing or stale"""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            header, data_start = read_header(data)
+            if not is_current(header, mixer_format):
+                return None
+            view = memoryview(data)
+            sounds = {}
+            for name in SOUND_FILES:
+                entry = header["sounds"][name]
+                start = data_start + entry["offset"]
+                sounds[name] = pygame.mixer.Sound(buffer=view[start:start + entry["length"]])
+            view.release()  # the mixer copied the samples, the map can be closed
+            return sounds
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def load_sounds():
+    """Sounds for the current mixer format, keyed by file name
+
+    Uses the pack when it is current, otherwise decodes the files, rebuilds
+    the pack for next time and loads from it.
+    """
+    mixer_format = pygame.mixer.get_init()
+    path = pack_path(mixer_format)
+    sounds = load_pack(path, mixer_format)
+    if sounds is not None:
+        log.info("Loaded sounds from %s", path)
+        return sounds
+
+    log.info("Sound pack %s missing or out of date, rebuilding", path)
+    try:
+        build_pack(mixer_format)
+    except OSError as e:
+        # Read-only install or similar, decode directly this time
+        log.warning("Could not write sound pack: %s", e)
+        return {name: pygame.mixer.Sound(os.path.join(SOUND_DIR, name)) for name in SOUND_FILES}
+    return load_pack(path, mixer_format)
+
+
+if __name__ == "__main__":
+    # Build a pack for every mixer setting init_game may end up with
+    for frequency, size, channels, buffer in MIXER_SETTINGS:
+        pygame.mixer.init(frequency=frequency, size=size, channels=channels, buffer=buffer)
+        print(f"Built {build_pack()}")
+        pygame.mixer.quit()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Play many headless games in parallel, one World per game, on a process pool.
+
+Every game gets its own seed (base seed + game number), so a batch is
+reproducible and any single game can be re-run with headless.py. Results
+stream back as games finish and are written one JSON object per line.
+
+    python batch.py --games 1000 --pilot random --output results.jsonl
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+import log
+import headless
+from world import World
+
+# Each worker process reuses one world (and its pools) for all of its games
+world = None
+
+
+def init_worker(log_level):
+    global world
+    log.set_level(log_level)
+    world = World()
+
+
+def play_game(job):
+    """Play one game and return its result, `job` is (game number, seed, frames, dt, pilot)"""
+    game, seed, frames, dt, pilot = job
+    if pilot == "random":
+        controls = headless.RandomControls(rng=random.Random(seed))
+    else:
+        controls = headless.NullControls()
+    result = headless.run_headless(frames, dt, controls, seed, world=world)
+    return {
+        "game": game,
+        "seed": seed,
+        "frames": result["frames"],
+        "survival_time": result["sim_time"],
+        "game_over": result["game_over"],
+        "asteroids_destroyed": result["asteroids_destroyed"],
+        "lives_lost": result["lives_lost"],
+        "elapsed": result["elapsed"],
+    }
+
+
+def summarize(results, wall_time):
+    survival = [result["survival_time"] for result in results]
+    return {
+        "games": len(results),
+        "game_overs": sum(result["game_over"] for result in results),
+        "frames": sum(result["frames"] for result in results),
+        "mean_survival_time": statistics.fmean(survival) if survival else 0.0,
+        "median_survival_time": statistics.median(survival) if survival else 0.0,
+        "mean_asteroids_destroyed": statistics.fmean(result["asteroids_destroyed"] for result in results) if results else 0.0,
+        "mean_lives_lost": statistics.fmean(result["lives_lost"] for result in results) if results else 0.0,
+        "wall_time": wall_time,
+        "games_per_second": len(results) / wall_time if wall_time > 0 else float("inf"),
+    }
+
+
+def run_batch(games, workers=None, frames=3600, dt=1 / 60, pilot="random", seed=0, output=None):
+    """Play `games` games on `workers` processes, yields each result as it comes in"""
+    jobs = [(game, seed + game, frames, dt, pilot) for game in range(games)]
+    workers = workers or os.cpu_count() or 1
+    # Small chunks keep the workers evenly loaded, games vary a lot in length
+    chunksize = max(1, games // (workers * 16))
+    with multiprocessing.Pool(workers, init_worker, (log.WARNING,)) as pool:
+        for result in pool.imap_unordered(play_game, jobs, chunksize):
+            if output:
+                output.write(json.dumps(result) + "\n")
+            yield result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play many headless games in parallel")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument("--frames", type=int, default=3600, help="step limit per game")
+    parser.add_argument("--dt", type=float, default=1 / 60, help="fixed step length in seconds")
+    parser.add_argument("--pilot", choices=["null", "random"], default="random", help="who holds the keys")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, the others count up from it")
+    parser.add_argument("--output", default=None, help="write per-game results here as JSON lines")
+    args = parser.parse_args()
+
+    output = open(args.output, "w") if args.output else None
+    results = []
+    start = time.perf_counter()
+    try:
+        for result in run_batch(args.games, args.workers, args.frames, args.dt, args.pilot, args.seed, output):
+            results.append(result)
+            if len(results) % max(1, args.games // 10) == 0:
+                print(f"{len(results)}/{args.games} games done", file=sys.stderr)
+    finally:
+        if output:
+            output.close()
+    summary = summarize(results, time.perf_counter() - start)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
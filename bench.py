@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Benchmarks for the update, collision, split and draw passes at growing entity counts.
+
+    python bench.py                      # run and write bench_results.json
+    python bench.py --save-baseline      # run and store the result as the baseline
+    python bench.py --compare            # run and fail if slower than the baseline
+
+Each case fills a World (see world.py) with N asteroids and N // 4 shots from a seeded random generator and times one pass of a
+subsystem (the best of --repeat runs). Drawing goes to an offscreen
+Surface. step_python and step_numpy time STEP_COUNT whole World.update()
+calls on each physics backend (step_numpy only if NumPy is installed).
+The bytes allocated per asteroid, shot and player are reported too, and so is the CPU used while a static screen waits for a key, which
+--compare also checks against --idle-cpu-limit.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import pygame
+from constants import *
+from player import Player
+from asteroidfield import AsteroidField
+from spritecache import SpriteCache
+from world import World
+import physics
+import log
+
+RESULTS_FILE = "bench_results.json"
+BASELINE_FILE = "bench_baseline.json"
+STEP_COUNT = 10  # World.update() calls per step case
+
+world = World()
+# One world per physics backend for the step cases
+step_worlds = {"python": World(numpy_physics=False)}
+if physics.np is not None:
+    step_worlds["numpy"] = World(numpy_physics=True)
+
+
+def populate(asteroid_count, shot_count, seed=0, target=world):
+    """Reset the world and fill it with asteroids and shots spread over the screen"""
+    rng = random.Random(seed)
+    target.activate()
+    player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+    target.reset(player, AsteroidField(), seed)  # seeds the split angles too
+    player.invulnerable = float("inf")  # keep the player out of the measurements (after reset, which clears timers)
+    asteroid_type = AsteroidField.asteroid_type
+    for _ in range(asteroid_count):
+        radius = ASTEROID_MIN_RADIUS * rng.randint(1, ASTEROID_KINDS)
+        asteroid = asteroid_type.create(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT), radius)
+        asteroid.velocity = pygame.Vector2(rng.uniform(40, 100), 0).rotate(rng.uniform(0, 360))
+    for _ in range(shot_count):
+        Player.shot_type.create(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT), rng.uniform(0, 360))
+    target.measure_travel(1 / SIM_TICK_RATE)  # what move() would leave for the collision queries
+    return player
+
+
+def bench_update(count):
+    def run():
+        for obj in world.updatable:
+            obj.update(1 / 60)
+    return run
+
+
+def bench_collisions(count):
+    def run():
+        world.rebuild_grid()
+        world.check_shot_collisions()
+    return run
+
+
+def bench_split_cascade(count):
+    def run():
+        # Keep splitting until only the smallest fragments are left
+        pending = list(world.asteroids)
+        while pending:
+            pending = [fragment for asteroid in pending for fragment in asteroid.split()]
+    return run
+
+
+def bench_step(count, target):
+    player = next(iter(target.players))
+    # The first step breaks most of the asteroids the random shots landed on, keep it off the clock
+    target.update(player, 1 / SIM_TICK_RATE)
+
+    def run():
+        for _ in range(STEP_COUNT):
+            target.update(player, 1 / SIM_TICK_RATE)
+    return run
+
+
+def bench_draw(count, surface):
+    def run():
+        for obj in world.drawable:
+            obj.draw(surface)
+    return run
+
+
+def bench_draw_cached(count, surface, cache):
+    def run():
+        cache.draw(surface, world.drawable)
+    return run
+
+
+def time_case(make_run, count, repeat, target=world):
+    """Best time in ms over `repeat` runs, each on a freshly populated world"""
+    best = float("inf")
+    for _ in range(repeat):
+        populate(count, count // 4, target=target)
+        run = make_run(count)
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def entity_memory(count=10000):
+    """Bytes allocated per entity, registry rows included, for each kind of entity"""
+    world.activate()
+    world.reset(None, AsteroidField())
+    kinds = {
+        "asteroid": lambda: AsteroidField.asteroid_type(0, 0, ASTEROID_MIN_RADIUS),
+        "shot": lambda: Player.shot_type(0, 0, 0),
+        "player": lambda: Player(0, 0),
+    }
+    results = {}
+    for name, make in kinds.items():
+        make()  # the first one creates the table
+        tracemalloc.start()
+        entities = [make() for _ in range(count)]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        # The list holding them isn't part of an entity
+        results[name] = round((size - sys.getsizeof(entities)) / count, 1)
+        print(f"{'memory/' + name:<28}{results[name]:10.1f} bytes")
+        for entity in entities:
+            entity.kill()
+    world.clear()
+    return results
+
+
+def idle_cpu(seconds=3):
+    """Share of one core used while main.wait_for_key() waits out its timeout"""
+    import main
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    main.wait_for_key((pygame.K_r, ), seconds)
+    share = (time.process_time() - cpu) / (time.perf_counter() - wall)
+    print(f"{'idle_cpu':<28}{share:10.2%} of a core ({pygame.display.get_driver()})")
+    return share
+
+
+def run_benchmarks(sizes, repeat):
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    cache = SpriteCache()
+    cases = {
+        "update": bench_update,
+        "shot_collisions": bench_collisions,
+        "split_cascade": bench_split_cascade,
+        "draw": lambda count: bench_draw(count, surface),
+        "draw_cached": lambda count: bench_draw_cached(count, surface, cache),
+    }
+    targets = {}  # case -> the world it runs on, if not `world`
+    for backend, target in step_worlds.items():
+        cases[f"step_{backend}"] = lambda count, target=target: bench_step(count, target)
+        targets[f"step_{backend}"] = target
+    results = {}
+    for name, make_run in cases.items():
+        for count in sizes:
+            key = f"{name}/{count}"
+            results[key] = round(time_case(make_run, count, repeat, targets.get(name, world)), 4)
+            print(f"{key:<28}{results[key]:10.3f} ms")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the cases slower than baseline * tolerance"""
+    regressions = []
+    for key, value in results.items():
+        reference = baseline.get(key)
+        if reference and value > reference * tolerance:
+            regressions.append((key, reference, value))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the game subsystems")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="asteroid counts to test (shots are a quarter of that)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case, the best one counts")
+    parser.add_argument("--output", default=RESULTS_FILE, help="where to write the results")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="fail if slower than the baseline")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="allowed slowdown factor before a case counts as a regression")
+    parser.add_argument("--idle-cpu-limit", type=float, default=IDLE_CPU_LIMIT,
+                        help="most of a core a waiting static screen may use with --compare")
+    args = parser.parse_args()
+    if args.compare and not args.save_baseline and not os.path.exists(args.baseline):
+        parser.exit(1, f"No baseline at {args.baseline}, record one with --save-baseline first\n")
+
+    log.set_level(log.OFF)
+    pygame.init()
+    results = run_benchmarks(args.sizes, args.repeat)
+    memory = entity_memory()
+    idle = idle_cpu()
+    report = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "numpy_physics": world.physics_kernel is not None,
+        "results_ms": results,
+        "memory_bytes_per_entity": memory,
+        "idle_cpu": idle,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results_ms"]
+        regressions = compare(results, baseline, args.tolerance)
+        for key, reference, value in regressions:
+            print(f"REGRESSION {key}: {value:.3f} ms (baseline {reference:.3f} ms)", file=sys.stderr)
+        if idle > args.idle_cpu_limit:
+            print(f"REGRESSION idle_cpu: {idle:.2%} of a core (limit {args.idle_cpu_limit:.2%})", file=sys.stderr)
+        if regressions or idle > args.idle_cpu_limit:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
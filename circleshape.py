@@ -1,19 +1,79 @@
+import math
 import pygame
+from constants import *
+from registry import Entity
+
+def sweep_time(offset, relative, reach):
+    """First time in 0..1 at which offset + relative * t is shorter than reach, or None
+
+    offset is the separation of two circles at the start of a step, relative
+    how it changes over the step and reach the sum of their radii.
+    """
+    c = offset.dot(offset) - reach * reach
+    if c < 0:
+        return 0.0  # already touching at the start
+    a = relative.dot(relative)
+    if a == 0:
+        return None
+    b = offset.dot(relative)
+    discriminant = b * b - a * c
+    if discriminant < 0:
+        return None
+    t = (-b - math.sqrt(discriminant)) / a
+    return t if 0 <= t <= 1 else None
+
 
 # Base class for game objects
-class CircleShape(pygame.sprite.Sprite):
+class CircleShape(Entity):
+    __slots__ = ("position", "velocity", "radius", "previous_position", "in_pool_use")
+    pool = None          # Pool that create() draws from, set in world.py
+
     def __init__(self, x, y, radius):
-        # we will be using this later
-        if hasattr(self, "containers"):
-            super().__init__(self.containers)
-        else:
-            super().__init__()
+        super().__init__()  # joins the active world's registry
+        self.in_pool_use = False  # True while handed out by a pool
+        self.position = pygame.Vector2(x, y)
+        self.velocity = pygame.Vector2(0, 0)
+        self.radius = radius
+        self.previous_position = self.position.copy()  # position before the last simulation step
 
+    @classmethod
+    def create(cls, *args):
+        """Build a new object, reusing a killed one when the class has a pool"""
+        if cls.pool:
+            return cls.pool.acquire(*args)
+        return cls(*args)
+
+    def reset(self, x, y, radius):
+        """Bring a killed object back as if it had just been created"""
+        if self.registry is not None:
+            self.registry.add(self)
         self.position = pygame.Vector2(x, y)
         self.velocity = pygame.Vector2(0, 0)
         self.radius = radius
+        self.previous_position = self.position.copy()
+
+    def kill(self):
+        super().kill()
+        # Hand the object back to its pool (only once, kill can be called twice)
+        if self.in_pool_use:
+            self.in_pool_use = False
+            self.pool.release(self)
+
+    def save_previous(self):
+        self.previous_position = self.position.copy()
+
+    def render_position(self, alpha):
+        """Position between the last two simulation steps, alpha is 0..1"""
+        position = self.position
+        if alpha >= 1:
+            return position
+        delta = position - self.previous_position
+        # Don't slide across the screen when the object just wrapped around
+        if abs(delta.x) > SCREEN_WIDTH / 2 or abs(delta.y) > SCREEN_HEIGHT / 2:
+            return position
+        return self.previous_position + delta * alpha
 
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
         # sub-classes must override
         pass
 
@@ -21,6 +81,25 @@ class CircleShape(pygame.sprite.Sprite):
         # sub-classes must override
         pass
     
+    def motion(self):
+        """Start and end of the last simulation step's movement"""
+        start = self.previous_position
+        end = self.position
+        # A wrap around the screen edge is a teleport, not a sweep across the screen
+        if abs(end.x - start.x) > SCREEN_WIDTH / 2 or abs(end.y - start.y) > SCREEN_HEIGHT / 2:
+            return end, end
+        return start, end
+
+    def time_of_impact(self, other):
+        """When during the last step the two circles first touched, as 0..1, or None
+
+        Both circles are swept along their motion over the step, so fast
+        objects can't pass through each other between two steps.
+        """
+        start, end = self.motion()
+        other_start, other_end = other.motion()
+        return sweep_time(start - other_start, (end - start) - (other_end - other_start),
+                          self.radius + other.radius)
+
     def collide(self, other):
-        distance = self.position.distance_to(other.position)
-        return distance < (self.radius + other.radius)
\ No newline at end of file
+        return self.time_of_impact(other) is not None
\ No newline at end of file
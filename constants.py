@@ -9,4 +9,77 @@ PLAYER_RADIUS = 20        # Here you would typically update and draw your game o
 PLAYER_TURN_SPEED = 300  # degrees per second
 PLAYER_SPEED = 200       # pixels per second
 SHOT_RADIUS = 5
-PLAYER_SHOT_SPEED = 500  # pixels per second
\ No newline at end of file
+PLAYER_SHOT_SPEED = 500  # pixels per second
+
+SPATIAL_HASH_CELL_SIZE = ASTEROID_MAX_RADIUS * 2  # one cell fits the largest asteroid
+USE_NUMPY_PHYSICS = False  # move asteroids and shots with the NumPy kernel in physics.py
+
+SIM_TICK_RATE = 60             # fixed simulation steps per second (collisions are swept, lower is safe)
+MAX_SIM_STEPS_PER_FRAME = 5    # catch-up limit after a long frame
+TIMER_RESOLUTION = 1 / SIM_TICK_RATE  # seconds per timer wheel tick (see timers.py)
+TIMER_WHEEL_BITS = 6           # 64 slots per level
+TIMER_WHEEL_LEVELS = 4         # 64**4 ticks, about 78 hours, before timers are parked and re-cascaded
+FPS_CAP = 60                   # render frame rate cap, 0 = uncapped
+VSYNC = False                  # let the display's refresh pace rendering instead of FPS_CAP
+REFRESH_RATE = 60              # Hz of the display with VSYNC, the frame time late frames are counted against
+LATE_FRAME_TOLERANCE = 0.1     # a frame is late when it overshoots its slot by more than 10%
+
+POOL_LIMIT = 512               # most killed asteroids/shots kept for reuse
+SHIP_ANGLE_STEPS = 120         # pre-rotated ship images (3 degrees apart)
+
+DIRTY_RECTS = True             # only redraw and update the screen areas that changed
+DIRTY_RECT_THRESHOLD = 0.3     # fall back to a full flip past this fraction of the screen
+PIPELINE = False               # simulate the next frame on a thread while this one is drawn (see pipeline.py)
+
+SCORE_DB = "scores.db"         # SQLite file for high scores and per-game stats (see scores.py), None to skip
+SCORE_FLUSH_INTERVAL = 2.0     # seconds between the score writer's transactions
+LEADERBOARD_SIZE = 5           # best games shown on the game over screen
+
+LOG_LEVEL = "INFO"             # DEBUG, INFO, WARNING, ERROR or OFF
+LOG_BUFFER_SIZE = 4096         # lines held for the log writer thread before dropping
+
+PROFILE = False                # time each phase of every frame (see profiler.py)
+PROFILE_OVERLAY = False        # show the timing table on screen, F3 toggles it
+PROFILE_WINDOW = 600           # frames in the rolling percentile window
+PROFILE_HISTORY = 216000       # frames kept for the dump (one hour at 60 FPS)
+PROFILE_DUMP = "profile.json"  # written at exit, .csv or .json, None to skip
+
+SOUND_DIR = "sounds"
+SOUND_FILES = ["laser.ogg", "rock_break.ogg", "heavy_ded.mp3", "lose.ogg"]
+SOUND_PACK_DIR = "sounds/packs"  # pre-decoded PCM, one file per mixer format
+SOUND = True                   # False uses the null audio backend: no mixer, nothing loaded
+SOUND_VOICES = 4               # mixer channels the sound manager hands out
+SOUND_VOLUME = 0.4
+# Sound events: file, priority (higher takes a voice from lower) and most voices at once
+SOUND_EVENTS = {
+    "laser": ("laser.ogg", 1, 2),
+    "rock_break": ("rock_break.ogg", 2, 1),
+    "death": ("heavy_ded.mp3", 3, 1),
+    "lose": ("lose.ogg", 4, 1),
+}
+# Mixer settings init_game tries in order: frequency, size, channels, buffer
+MIXER_SETTINGS = [
+    (22050, -16, 4, 512),    # more compatible settings (lower frequency)
+    (11025, -8, 4, 4096),    # minimal settings if that fails
+]
+
+IDLE_TIMEOUT = 60              # seconds on the game over screen before the attract screen, None = never
+IDLE_POLL_INTERVAL = 0.05      # seconds between event checks on static screens, where SDL can't block
+IDLE_CPU_LIMIT = 0.01          # most of a core a static screen may use while it waits, see tests/test_idle.py
+
+RECORD_REPLAYS = False         # save every game's inputs to REPLAY_DIR (see replay.py)
+REPLAY_DIR = "replays"
+REPLAY_CHECKSUM_INTERVAL = 60  # steps between world state checksums in a replay
+
+NET_PORT = 7777                # UDP port of the multiplayer server (see net.py)
+NET_SNAPSHOT_INTERVAL = 3      # simulation steps between snapshots sent to clients
+NET_INTERP_DELAY = 0.1         # seconds clients render other entities in the past
+NET_TIMEOUT = 5.0              # seconds of silence before the server drops a client
+
+QUALITY_GOVERNOR = True        # lower drawing quality, then spawns, when frames run over budget
+QUALITY_WINDOW = 30            # frames averaged per decision
+QUALITY_DEGRADE_AT = 0.9       # step down when frame work passes this fraction of the budget
+QUALITY_RESTORE_AT = 0.5       # step back up below this fraction
+QUALITY_HOLD_FRAMES = 120      # frames to stay at a level after a change
+QUALITY_SPAWN_THROTTLE = 2.0   # spawn interval multiplier at the "fewer spawns" level
+QUALITY_ASTEROID_CAP = 150     # no new spawns past this many asteroids at the last level
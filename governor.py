@@ -0,0 +1,119 @@
+import time
+import pygame
+from constants import *
+from asteroid import Asteroid
+from spritecache import SpriteCache, asteroid_radii
+import log
+
+# What each level adds on top of the ones below it
+LEVELS = (
+    "full quality",
+    "outlined asteroids",
+    "half resolution",
+    "fewer spawns",
+    "asteroid cap",
+)
+
+
+class QualityGovernor:
+    """Trades visual quality (and then spawns) for frame time when frames run over budget
+
+    Frame work (everything but the wait for the next frame slot) is averaged
+    over QUALITY_WINDOW frames. Above QUALITY_DEGRADE_AT of the budget the
+    level goes up one step, below QUALITY_RESTORE_AT it comes back down, and
+    after every change the level holds for QUALITY_HOLD_FRAMES frames, so it
+    doesn't flip back and forth around the budget.
+    """
+    def __init__(self, budget, max_level=len(LEVELS) - 1):
+        self.budget = budget          # seconds of work a frame may take
+        self.max_level = max_level    # levels past 2 change gameplay, replays stop there
+        self.level = 0
+        self.frame_start = 0.0
+        self.work_times = []          # this window's frame work in seconds
+        self.hold = 0                 # frames left before the level may change again
+        self.frames = 0
+        self.frames_at_level = [0] * len(LEVELS)
+        self.changes = 0
+        self.world = None
+        self.asteroid_field = None
+        self.low_res_surface = None
+        self.low_res_cache = None
+        self.apply()
+
+    @property
+    def low_res(self):
+        return self.level >= 2
+
+    def attach(self, world, asteroid_field):
+        """Let the spawn levels act on this world's asteroid field"""
+        self.world = world
+        self.asteroid_field = asteroid_field
+        self.apply()
+        # Build the half resolution sprites now (a few ms), not on the frame
+        # that is already over budget when the level reaches 2
+        screen = pygame.display.get_surface()
+        if self.max_level >= 2 and screen is not None:
+            self.prepare_low_res(screen)
+
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """Record the frame's work and change the level if the window calls for it"""
+        self.work_times.append(time.perf_counter() - self.frame_start)
+        self.frames += 1
+        self.frames_at_level[self.level] += 1
+        if self.hold:
+            self.hold -= 1
+        if len(self.work_times) >= QUALITY_WINDOW:
+            average = sum(self.work_times) / len(self.work_times)
+            self.work_times.clear()
+            if not self.hold:
+                if average > self.budget * QUALITY_DEGRADE_AT and self.level < self.max_level:
+                    self.set_level(self.level + 1, average)
+                elif average < self.budget * QUALITY_RESTORE_AT and self.level > 0:
+                    self.set_level(self.level - 1, average)
+
+        # The cap is checked every frame, it depends on how many asteroids there are now
+        if self.asteroid_field:
+            self.asteroid_field.spawning = self.level < 4 or len(self.world.asteroids) < QUALITY_ASTEROID_CAP
+
+    def set_level(self, level, average=None):
+        if average is not None:
+            log.info("Quality %s -> %s (%s), frame work %.1f ms of a %.1f ms budget", self.level, level,
+                     LEVELS[level], average * 1000, self.budget * 1000)
+        self.level = level
+        self.hold = QUALITY_HOLD_FRAMES
+        self.changes += 1
+        self.apply()
+
+    def apply(self):
+        Asteroid.outline = self.level >= 1
+        if self.asteroid_field:
+            self.asteroid_field.spawn_interval = ASTEROID_SPAWN_RATE * (QUALITY_SPAWN_THROTTLE if self.level >= 3 else 1)
+            self.asteroid_field.spawning = True
+
+    def prepare_low_res(self, screen):
+        """The half resolution surface and sprite cache, outlined asteroids included"""
+        if self.low_res_surface is not None:
+            return
+        size = (screen.get_width() // 2, screen.get_height() // 2)
+        self.low_res_surface = pygame.Surface(size).convert(screen)
+        self.low_res_cache = SpriteCache(scale=0.5)
+        for radius in asteroid_radii():
+            self.low_res_cache.circle("brown", radius, 2)  # every level from 1 up draws outlines
+
+    def draw_low_res(self, screen, sprites, alpha):
+        """Draw the sprites at half resolution and scale them up to the screen, returns the rects drawn"""
+        self.prepare_low_res(screen)  # normally done by attach()
+        self.low_res_surface.fill((0, 0, 0))
+        self.low_res_cache.draw(self.low_res_surface, sprites, alpha)
+        pygame.transform.scale(self.low_res_surface, screen.get_size(), screen)
+        return [screen.get_rect()]
+
+    def stats(self):
+        return {
+            "level": self.level,
+            "level_changes": self.changes,
+            "frames_at_level": list(self.frames_at_level),
+        }
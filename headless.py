@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Run the game simulation without a window, sound or frame rate cap.
+
+Example:
+    python headless.py --frames 10000 --dt 0.016 --seed 1 --pilot random
+"""
+import os
+
+# No real window or audio device is ever opened, but make sure SDL would not
+# try to if something calls into it
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import random
+import time
+import pygame
+from constants import *
+from player import Player
+from asteroidfield import AsteroidField
+from world import World
+
+
+class HeldKeys:
+    """Key state in the same shape as pygame.key.get_pressed()"""
+    def __init__(self, keys=()):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+NO_KEYS = HeldKeys()
+
+
+class NullControls:
+    """Never presses anything"""
+    def __call__(self):
+        return NO_KEYS
+
+
+class ScriptedControls:
+    """Plays back a list of held-key sets, one per frame, repeating the last one"""
+    def __init__(self, script):
+        self.script = [HeldKeys(keys) for keys in script] or [NO_KEYS]
+        self.frame = 0
+
+    def __call__(self):
+        keys = self.script[min(self.frame, len(self.script) - 1)]
+        self.frame += 1
+        return keys
+
+
+class RandomControls:
+    """Holds a random set of keys, changing it every few frames"""
+    choices = [
+        (),
+        (pygame.K_w,),
+        (pygame.K_a, pygame.K_SPACE),
+        (pygame.K_d, pygame.K_SPACE),
+        (pygame.K_w, pygame.K_SPACE),
+        (pygame.K_s,),
+    ]
+
+    def __init__(self, hold_frames=15, rng=random):
+        self.hold_frames = hold_frames
+        self.rng = rng
+        self.frame = 0
+        self.keys = NO_KEYS
+
+    def __call__(self):
+        if self.frame % self.hold_frames == 0:
+            self.keys = HeldKeys(self.rng.choice(self.choices))
+        self.frame += 1
+        return self.keys
+
+
+def run_headless(frames, dt=1 / 60, controls=None, seed=None, recorder=None, world=None):
+    """Simulate up to `frames` fixed steps of `dt` seconds and return a summary dict
+
+    With a replay.Recorder the session is recorded (and seeded by the recorder).
+    Each call starts a new game in `world`, or in a fresh World if none is given.
+    """
+    world = world or World()
+    world.activate()
+    player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+    lives = player.lives
+    player.controls = controls or NullControls()
+    if recorder:
+        recorder.begin(player)
+    asteroid_field = AsteroidField()
+    world.reset(player, asteroid_field, recorder.seed if recorder else seed)
+
+    game_over = False
+    frame = 0
+    start = time.perf_counter()
+    while frame < frames and not game_over:
+        game_over = world.update(player, dt)
+        if recorder:
+            recorder.end_step(dt, player, world.asteroids, world.shots)
+        frame += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "frames": frame,
+        "sim_time": frame * dt,
+        "game_over": game_over,
+        "lives": player.lives,
+        "lives_lost": lives - player.lives,
+        "asteroids_destroyed": world.asteroids_destroyed,
+        "asteroids": len(world.asteroids),
+        "shots": len(world.shots),
+        "elapsed": elapsed,
+        "fps": frame / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the game simulation headless")
+    parser.add_argument("--frames", type=int, default=3600, help="number of steps to simulate")
+    parser.add_argument("--dt", type=float, default=1 / 60, help="fixed step length in seconds")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the world's random streams (and of the random pilot)")
+    parser.add_argument("--pilot", choices=["null", "random"], default="null",
+                        help="who holds the keys")
+    args = parser.parse_args()
+
+    controls = RandomControls(rng=random.Random(args.seed)) if args.pilot == "random" else NullControls()
+    result = run_headless(args.frames, args.dt, controls, args.seed)
+    for key, value in result.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,103 @@
+"""Leveled logging for the game loop.
+
+Messages below the current level cost one comparison: the arguments are
+never formatted. Enabled messages are formatted on the caller's thread
+(so they show the values at that moment), pushed into a bounded ring
+buffer and written out by a background thread, so the frame never waits
+on stdout. When the buffer is full the oldest lines are dropped.
+
+    log.debug("Spawned asteroid at %s", position)
+
+Guard anything expensive to compute with log.enabled():
+
+    if log.enabled(log.DEBUG):
+        log.debug("Entities: %s", world.registry.stats())
+"""
+import atexit
+import collections
+import sys
+import threading
+from constants import *
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+
+level = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR, "OFF": OFF}[LOG_LEVEL]
+stream = sys.stdout
+dropped = 0  # lines lost because the ring buffer was full
+
+_buffer = collections.deque(maxlen=LOG_BUFFER_SIZE)
+_wakeup = threading.Event()
+_write_lock = threading.Lock()
+_thread = None
+
+
+def set_level(new_level):
+    global level
+    level = new_level
+
+
+def enabled(at_level):
+    return at_level >= level
+
+
+def debug(message, *args):
+    if DEBUG >= level:
+        _emit(DEBUG, message, args)
+
+
+def info(message, *args):
+    if INFO >= level:
+        _emit(INFO, message, args)
+
+
+def warning(message, *args):
+    if WARNING >= level:
+        _emit(WARNING, message, args)
+
+
+def error(message, *args):
+    if ERROR >= level:
+        _emit(ERROR, message, args)
+
+
+def _emit(at_level, message, args):
+    global dropped
+    if args:
+        message = message % args
+    if len(_buffer) == LOG_BUFFER_SIZE:
+        dropped += 1
+    _buffer.append(f"[{LEVEL_NAMES[at_level]}] {message}")
+    if _thread is None:
+        _start()
+    _wakeup.set()
+
+
+def _start():
+    global _thread
+    _thread = threading.Thread(target=_sink, name="log-sink", daemon=True)
+    _thread.start()
+    atexit.register(flush)
+
+
+def _sink():
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+        flush()
+
+
+def flush():
+    """Write out everything buffered so far"""
+    with _write_lock:
+        lines = []
+        while _buffer:
+            lines.append(_buffer.popleft())
+        if lines:
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
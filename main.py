@@ -1,239 +1,395 @@
+import os
+import time
 import pygame
 from constants import *
 from player import Player
-from asteroid import Asteroid
 from asteroidfield import AsteroidField
-from shot import Shot
+from world import World, asteroid_pool, shot_pool
+from timestep import FixedTimestep, FramePacer
+from spritecache import SpriteCache
+from renderer import DirtyRenderer
+from profiler import FrameProfiler
+from governor import QualityGovernor, LEVELS
+from pipeline import SimPipeline
+import audio
+import scores
+from replay import Recorder
+import log
 
-updatable = pygame.sprite.Group()
-drawable = pygame.sprite.Group()
-asteroids = pygame.sprite.Group()
-shots = pygame.sprite.Group()
+# The one world the window shows, see world.py
+world = World()
+world.activate()
 
-Player.containers = (updatable, drawable)
-Asteroid.containers = (updatable, drawable, asteroids)
-AsteroidField.containers = (updatable, )
-Shot.containers = (updatable, drawable, shots)
+# wait_for_key() result when its timeout ran out
+TIMED_OUT = "timed out"
+
+# Video drivers whose event.wait() sleeps until an event arrives. With the
+# others (kmsdrm, dummy, ...) SDL checks for events every millisecond.
+BLOCKING_WAIT_DRIVERS = ("x11", "wayland", "windows", "cocoa")
+
+# Fonts by size, see get_font()
+fonts = {}
+
+# Startup timings: "launch" is set by main(), "first_frame_ms" once a frame is shown
+startup = {}
+
+# Per-phase frame timings, None when profiling is off
+profiler = FrameProfiler() if PROFILE else None
+world.profiler = profiler
+
+
+def get_font(size):
+    """Default font at the given size, each size is only built once"""
+    font = fonts.get(size)
+    if font is None:
+        font = fonts[size] = pygame.font.Font(None, size)
+    return font
 
 
 def init_game():
     """Initialize the game and return necessary objects"""
-    # Try to initialize the sound mixer, but continue if it fails
-    laser_sound = None
-    rock_break_sound = None
-    death_sound = None
-    lose_sound = None
-    try:
-        # Try with more compatible settings (lower frequency, mono audio)
-        pygame.mixer.init(frequency=22050, size=-16, channels=4, buffer=512)
-        
-        # Reserve channel 1 for asteroid breaking sounds to prevent overlapping
-        rock_break_channel = pygame.mixer.Channel(1)
-        rock_break_channel.set_volume(0.4)  # Set volume to 40% for this channel
-        
-        # Reserve channel 2 for player death sound
-        death_channel = pygame.mixer.Channel(2)
-        death_channel.set_volume(0.4)  # Set volume to 40% for this channel
-        
-        # Reserve channel 3 for game over sound
-        lose_channel = pygame.mixer.Channel(3)
-        lose_channel.set_volume(0.4)  # Set volume to 40% for this channel
-        
-        laser_sound = pygame.mixer.Sound("sounds/laser.ogg")
-        laser_sound.set_volume(0.4)  # Set laser sound volume to 40% as well
-        
-        rock_break_sound = pygame.mixer.Sound("sounds/rock_break.ogg")
-        # Set the volume of rock_break sound to 40%
-        rock_break_sound.set_volume(0.4)
-        
-        death_sound = pygame.mixer.Sound("sounds/heavy_ded.mp3")
-        death_sound.set_volume(0.4)  # Set death sound volume to 40%
-        
-        lose_sound = pygame.mixer.Sound("sounds/lose.ogg")
-        lose_sound.set_volume(0.4)  # Set game over sound volume to 40%
-        print("Sound initialized successfully!")
-    except pygame.error as e:
+    screen = None
+    if VSYNC:
         try:
-            # If default fails, try with minimal settings
-            pygame.mixer.init(frequency=11025, size=-8, channels=4, buffer=4096)
-            
-            # Reserve channel 1 for asteroid breaking sounds to prevent overlapping
-            rock_break_channel = pygame.mixer.Channel(1)
-            rock_break_channel.set_volume(0.4)  # Set volume to 40% for this channel
-            
-            # Reserve channel 2 for player death sound
-            death_channel = pygame.mixer.Channel(2)
-            death_channel.set_volume(0.4)  # Set volume to 40% for this channel
-            
-            # Reserve channel 3 for game over sound
-            lose_channel = pygame.mixer.Channel(3)
-            lose_channel.set_volume(0.4)  # Set volume to 40% for this channel
-            
-            laser_sound = pygame.mixer.Sound("sounds/laser.ogg")
-            laser_sound.set_volume(0.4)  # Set laser sound volume to 40% as well
-            
-            rock_break_sound = pygame.mixer.Sound("sounds/rock_break.ogg")
-            # Set the volume of rock_break sound to 40%
-            rock_break_sound.set_volume(0.4)
-            
-            death_sound = pygame.mixer.Sound("sounds/heavy_ded.mp3")
-            death_sound.set_volume(0.4)  # Set death sound volume to 40%
-            
-            lose_sound = pygame.mixer.Sound("sounds/lose.ogg")
-            lose_sound.set_volume(0.4)  # Set game over sound volume to 40%
-            print("Sound initialized with minimal settings!")
-        except pygame.error as e2:
-            print(f"Sound could not be initialized: {e}")
-            print("Game will continue without sound.")
-    
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            # vsync needs a renderer-backed window, which SCALED gives us
+            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SCALED, vsync=1)
+        except pygame.error as e:
+            log.warning("Vsync not available (%s), using the frame rate cap instead", e)
+    if screen is None:
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    
+    # The mixer and sounds load in the background while the first frames are shown,
+    # events posted before they are ready are dropped
+    sound = audio.SoundManager() if SOUND else audio.NullAudio()
+    sound.start()
+    audio.install(sound)
+    
+    # Scores and game stats are written to disk by a background thread
+    store = scores.ScoreStore() if SCORE_DB else scores.NullStore()
+    store.start()
+    scores.install(store)
+    
     clock = pygame.time.Clock()
-    player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, laser_sound, death_sound)  # Pass the sounds to player
+    sprite_cache = SpriteCache()  # Pre-render sprites once the display format is known
+    player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
     asteroid_field = AsteroidField()  # Create a new AsteroidField object
-    dt = 0  # Assuming a frame rate of ~60 FPS
-    font = pygame.font.Font(None, 36)  # Font for displaying lives
     
-    print("Game initialized!")
-    return screen, clock, player, asteroid_field, laser_sound, rock_break_sound, death_sound, rock_break_channel, lose_sound, lose_channel
+    log.info("Game initialized!")
+    return screen, clock, player, asteroid_field, sound, sprite_cache
+
 
+def wait_for_key(keys=None, timeout=None):
+    """Sleep until one of `keys` (any key if None) is pressed and return it
+
+    Returns None when the window is closed and TIMED_OUT when `timeout`
+    seconds pass first. Nothing is updated or drawn meanwhile, the process
+    sleeps until an event arrives.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    blocking = pygame.display.get_driver() in BLOCKING_WAIT_DRIVERS
+    while True:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            return TIMED_OUT
+        if blocking:
+            event = pygame.event.wait() if remaining is None else pygame.event.wait(int(remaining * 1000) + 1)
+        else:
+            # Checking a few times a second ourselves is far cheaper than SDL's polling
+            event = pygame.event.poll()
+            if event.type == pygame.NOEVENT:
+                time.sleep(IDLE_POLL_INTERVAL if remaining is None else min(IDLE_POLL_INTERVAL, remaining))
+                continue
+        if event.type == pygame.QUIT:
+            return None
+        if event.type == pygame.KEYDOWN and (keys is None or event.key in keys):
+            return event.key
+        if event.type == pygame.WINDOWEXPOSED:
+            pygame.display.flip()  # the window was uncovered, show the screen again
+
+
+def draw_message(screen, title, color, subtitle):
+    """Title and a line of text in the middle of the screen, over whatever is there"""
+    title_text = get_font(72).render(title, True, color)
+    subtitle_text = get_font(36).render(subtitle, True, (255, 255, 255))
+    screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 
+                             SCREEN_HEIGHT // 3))
+    screen.blit(subtitle_text, (SCREEN_WIDTH // 2 - subtitle_text.get_width() // 2, 
+                                SCREEN_HEIGHT // 2))
+    pygame.display.flip()
 
-def show_game_over_screen(screen, clock, font, lose_sound=None, lose_channel=None):
+
+def show_pause_screen(screen):
+    """Dim the frame and wait for P, returns False if the window was closed"""
+    shade = pygame.Surface(screen.get_size())
+    shade.set_alpha(160)
+    screen.blit(shade, (0, 0))
+    draw_message(screen, "PAUSED", (255, 255, 255), "Press P to Resume")
+    return wait_for_key((pygame.K_p, )) is not None
+
+
+def show_attract_screen(screen):
+    """Title screen for an idle cabinet, returns True to start a game and False to quit"""
+    screen.fill((0, 0, 0))
+    draw_message(screen, "LAZZY ASTEROIDS", (255, 200, 0), "Press Any Key to Play")
+    key = wait_for_key()
+    return key is not None and key != pygame.K_q
+
+
+def draw_leaderboard(screen, best):
+    """The best finished games as (score, duration, started) rows, under the middle of the screen"""
+    if not best:
+        return
+    font = get_font(28)
+    lines = ["HIGH SCORES"] + [
+        f"{rank}.  {score:>4}   {int(duration) // 60}:{int(duration) % 60:02}   {time.strftime('%Y-%m-%d', time.localtime(started))}"
+        for rank, (score, duration, started) in enumerate(best, 1)]
+    y = SCREEN_HEIGHT // 2 + 60
+    for line in lines:
+        text = font.render(line, True, (200, 200, 200))
+        screen.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, y))
+        y += text.get_height() + 6
+
+
+def show_game_over_screen(screen):
     """Display the game over screen with restart option"""
-    # Play the game over sound if available
-    if lose_sound and lose_channel:
-        lose_channel.play(lose_sound)
-    
-    big_font = pygame.font.Font(None, 72)
-    game_over_text = big_font.render("GAME OVER", True, (255, 0, 0))
-    restart_text = font.render("Press R to Restart or Q to Quit", True, (255, 255, 255))
+    # Play the game over sound, along with the death sound from the last step
+    audio.post(audio.LOSE)
+    audio.flush()
     
     screen.fill((0, 0, 0))  # Fill screen with black
-    screen.blit(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, 
-                                SCREEN_HEIGHT // 3))
-    screen.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, 
-                              SCREEN_HEIGHT // 2))
-    pygame.display.flip()
+    draw_leaderboard(screen, scores.backend.top(LEADERBOARD_SIZE))
+    draw_message(screen, "GAME OVER", (255, 0, 0), "Press R to Restart or Q to Quit")
     
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False  # Quit game
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_r:
-                    return True  # Restart game
-                if event.key == pygame.K_q:
-                    return False  # Quit game
-                    
-        clock.tick(60)
-    
-    return False
+    key = wait_for_key((pygame.K_r, pygame.K_q), IDLE_TIMEOUT)
+    if key == TIMED_OUT:
+        return show_attract_screen(screen)  # Nobody is playing
+    return key == pygame.K_r  # Restart game, or quit on Q and window close
+
+
+def log_game_over(pacer, timestep, governor, pipeline=None):
+    log.info("Game Over! No lives remaining.")
+    log.info("Frame pacing: %s, skipped sim steps: %s", pacer.stats(), timestep.skipped_steps)
+    log.info("Timers: %s", world.timers.stats())
+    if governor:
+        log.info("Quality: %s", governor.stats())
+    if pipeline:
+        log.info("Pipeline: %s", pipeline.stats())
 
 
-def game_loop(screen, clock, player, asteroid_field, laser_sound, rock_break_sound, death_sound, rock_break_channel):
+def game_loop(screen, clock, player, asteroid_field, sound, sprite_cache=None):
     """Main game loop"""
-    font = pygame.font.Font(None, 36)  # Font for displaying lives
+    font = get_font(36)  # Font for displaying lives
     
-    print("Starting Asteroids!")
-    print(f"Screen width: {SCREEN_WIDTH}")
-    print(f"Screen height: {SCREEN_HEIGHT}")
+    sounds_logged = False
     
-    # Clear sprite groups to ensure a clean start
-    global updatable, drawable, asteroids, shots
-    updatable.empty()
-    drawable.empty()
-    asteroids.empty()
-    shots.empty()
+    log.info("Starting Asteroids!")
+    log.info("Screen width: %s", SCREEN_WIDTH)
+    log.info("Screen height: %s", SCREEN_HEIGHT)
     
-    # Re-add the player and asteroid field
-    updatable.add(player)
-    drawable.add(player)
-    updatable.add(asteroid_field)
+    # Record the seed and every step's input so the game can be replayed exactly
+    recorder = None
+    if RECORD_REPLAYS:
+        recorder = Recorder()
+        recorder.begin(player)
+        replay_path = os.path.join(REPLAY_DIR, time.strftime("%Y%m%d-%H%M%S") + ".lzr")
+    
+    world.reset(player, asteroid_field, recorder.seed if recorder else None)
+    scores.backend.begin_session(world.seed)  # ended by main() once game_loop returns
+    
+    # The simulation runs at SIM_TICK_RATE, independent of how fast we render
+    timestep = FixedTimestep()
+    pacer = FramePacer(clock, vsync=VSYNC and bool(screen.get_flags() & pygame.SCALED))
+    pacer.start()  # Start timing from here, not from when the clock was created
+    
+    # Lower the quality when frames run over budget. While recording only the
+    # drawing levels are used, replays don't know about spawn changes.
+    governor = None
+    if QUALITY_GOVERNOR:
+        governor = QualityGovernor(pacer.target or 1 / SIM_TICK_RATE, 2 if recorder else len(LEVELS) - 1)
+        governor.attach(world, asteroid_field)
+    
+    # Simulate the next frame on its own thread while this one is drawn, the
+    # snapshots it hands over are drawn with the sprite cache
+    pipeline = None
+    if PIPELINE and sprite_cache:
+        pipeline = SimPipeline(world, player, timestep, recorder)
+        pipeline.start()
+    world.profiler = None if pipeline else profiler  # laps from another thread would mix up the phases
+    
+    # Dirty rects need the rects from the sprite cache's batched blit
+    renderer = None
+    if DIRTY_RECTS and sprite_cache:
+        renderer = DirtyRenderer(screen)
+        renderer.reset()
     
     # Main game loop
     running = True
-    game_over = False
     frame_count = 0
-    dt = 0
     
     while running:
+        if profiler:
+            profiler.begin_frame()
+        if governor:
+            governor.begin_frame()
+        
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if pipeline:
+                    pipeline.stop()
+                if recorder:
+                    recorder.save(replay_path)
                 return False  # Signal to exit the entire game
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and profiler:
+                profiler.overlay = not profiler.overlay
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+                # Nothing is simulated while paused, the loop sleeps in show_pause_screen
+                if not show_pause_screen(screen):
+                    if pipeline:
+                        pipeline.stop()
+                    if recorder:
+                        recorder.save(replay_path)
+                    return False
+                # Start timing afresh so the paused time isn't simulated
+                pacer.start()
+                if profiler:
+                    profiler.begin_frame()
+                if governor:
+                    governor.begin_frame()
+                if renderer:
+                    renderer.reset()  # the pause screen covered everything
+        
+        if not sounds_logged and sound.ready.is_set():
+            sounds_logged = True
+            if sound.load_time is not None:
+                log.info("Sounds ready after %.1f ms of loading", sound.load_time * 1000)
         
-        # Print debug info every 60 frames
+        # Log debug info every 60 frames
         frame_count += 1
-        if frame_count % 60 == 0:
-            print(f"Number of objects: updatable={len(updatable)}, drawable={len(drawable)}, asteroids={len(asteroids)}")
-            
-        screen.fill((0, 0, 0))  # Fill the screen with black
+        if frame_count % 60 == 0 and log.enabled(log.DEBUG):
+            log.debug("Number of objects: %s", world.registry.stats())
+            log.debug("Frame pacing: %s, skipped sim steps: %s", pacer.stats(), timestep.skipped_steps)
+            log.debug("Pools: asteroids=%s, shots=%s", asteroid_pool.stats(), shot_pool.stats())
+            log.debug("Timers: %s", world.timers.stats())
+            if renderer:
+                log.debug("Renderer: %s", renderer.stats())
+            if governor:
+                log.debug("Quality: %s", governor.stats())
+            if pipeline:
+                log.debug("Pipeline: %s", pipeline.stats())
+            log.debug("Sound: %s", sound.stats())
+        if profiler:
+            profiler.lap("events")
         
-        # Update all objects
-        for obj in updatable:
-            obj.update(dt)  # Update things
+        low_res = governor and governor.low_res and sprite_cache
+        if low_res:
+            pass  # the scaled-up frame covers the whole screen
+        elif renderer:
+            renderer.begin()  # Erase only what was drawn last frame
+        else:
+            screen.fill((0, 0, 0))  # Fill the screen with black
+        if profiler:
+            profiler.lap("draw")  # Erasing counts as drawing
         
-        # Check for player collisions with asteroids
-        for asteroid in asteroids:
-            if player.collide(asteroid):
-                # Player loses a life when colliding with an asteroid
-                game_over = player.lose_life()
+        if pipeline:
+            # The simulation thread steps the next frame while this one is drawn
+            snapshot = pipeline.snapshot
+            pipeline.request(pygame.key.get_pressed(), pacer.frame_time)
+            sprites, alpha, lives = snapshot.sprites, 1.0, snapshot.lives  # views are already blended
+        else:
+            # Run as many fixed steps as the last frame's time covers
+            for _ in range(timestep.advance(pacer.frame_time)):
+                game_over = world.update(player, timestep.dt)
+                if recorder:
+                    recorder.end_step(timestep.dt, player, world.asteroids, world.shots)
                 if game_over:
-                    print("Game Over! No lives remaining.")
-                    running = False
+                    if recorder:
+                        recorder.save(replay_path)
+                    log_game_over(pacer, timestep, governor)
                     return "game_over"  # Signal game over to main function
-                else:
-                    # Destroy the asteroid that hit the player
-                    asteroid.split()
-                
-        # Check for shot collisions with asteroids
-        for shot in shots:
-            for asteroid in list(asteroids):  # Create a copy of the list to avoid modification during iteration
-                # Simple circle collision detection
-                distance = (shot.position - asteroid.position).length()
-                if distance < (shot.radius + asteroid.radius):
-                    shot.kill()
-                    asteroid.split()  # Call the split method instead of just killing the asteroid
-                    # Play rock breaking sound effect if available
-                    if rock_break_sound:
-                        # Use the reserved channel to prevent overlapping sounds
-                        # If a sound is already playing, it will be stopped and the new one will start
-                        rock_break_channel.play(rock_break_sound)
-                    print("Shot hit asteroid!")
-
-        # Draw all objects
-        for obj in drawable:
-            obj.draw(screen)  # Draw things
+            audio.flush()  # Play this frame's sounds, once per event however many steps posted it
+            # Draw all objects, blended between the last two simulation steps
+            sprites, alpha, lives = world.drawable, timestep.alpha, player.lives
+
+        if low_res:
+            drawn = governor.draw_low_res(screen, sprites, alpha)
+        elif sprite_cache:
+            drawn = sprite_cache.draw(screen, sprites, alpha)  # One batched blit for everything
+        else:
+            for obj in world.drawable:
+                obj.draw(screen, alpha)  # Draw things
+        if profiler:
+            profiler.lap("draw")
             
         # Draw lives counter
-        lives_text = font.render(f"Lives: {player.lives}", True, (255, 255, 255))
-        screen.blit(lives_text, (20, 20))
+        lives_text = font.render(f"Lives: {lives}", True, (255, 255, 255))
+        hud_rects = [screen.blit(lives_text, (20, 20))]
+        if profiler:
+            profiler.gauges["timers"] = world.timers.pending
+            if governor:
+                profiler.gauges["quality"] = governor.level
+            if pipeline:
+                profiler.gauges["overlap"] = f"{pipeline.stats()['overlap']:.0%}"
+            hud_rects += profiler.draw_overlay(screen)
+            profiler.lap("hud")
         
-        pygame.display.flip()  # Update the display
-        clock.tick(60)  # Cap the frame rate at 60 FPS
-        dt = clock.get_time() / 1000.0  # Delta time in seconds
+        if governor and pacer.vsync:
+            governor.end_frame()  # flip waits for the refresh, that isn't work
+        # Update the display
+        if renderer:
+            renderer.present(drawn + hud_rects)  # Only the changed areas, unless too much changed
+        else:
+            pygame.display.flip()
+        if pipeline:
+            if profiler:
+                profiler.lap("flip")
+            snapshot = pipeline.collect()
+            if profiler:
+                profiler.lap("update")  # only the part of the simulation the main thread waited for
+            if snapshot.game_over:
+                pipeline.stop()
+                if recorder:
+                    recorder.save(replay_path)
+                log_game_over(pacer, timestep, governor, pipeline)
+                return "game_over"
+        if governor and not pacer.vsync:
+            governor.end_frame()
+        if profiler:
+            profiler.lap("flip")
+        if "first_frame_ms" not in startup and "launch" in startup:
+            startup["first_frame_ms"] = (time.perf_counter() - startup["launch"]) * 1000
+            log.info("Time to first frame: %.1f ms", startup["first_frame_ms"])
+        pacer.tick()  # Cap the frame rate (unless uncapped or vsynced) and measure it
+        if profiler:
+            profiler.lap("wait")
+            profiler.end_frame()
     
     return True  # Signal normal exit from game loop
 
 
 def main():
     """Main game function handling game over and restart"""
-    pygame.init()
+    startup["launch"] = time.perf_counter()
+    # Only what the first frame needs, the mixer is started by the SoundManager
+    pygame.display.init()
+    pygame.font.init()
     
     # Game state variables
     running = True
     
     # Initialize the game for the first time
-    screen, clock, player, asteroid_field, laser_sound, rock_break_sound, death_sound, rock_break_channel, lose_sound, lose_channel = init_game()
+    screen, clock, player, asteroid_field, sound, sprite_cache = init_game()
     
     while running:
         # Run the main game loop
-        result = game_loop(screen, clock, player, asteroid_field, laser_sound, rock_break_sound, death_sound, rock_break_channel)
+        result = game_loop(screen, clock, player, asteroid_field, sound, sprite_cache)
+        # Only games that ended in a game over go on the leaderboard
+        scores.backend.end_session(world.time, world.asteroids_destroyed, result == "game_over")
         
         if result == "game_over":
             # Show game over screen and check for restart
-            if show_game_over_screen(screen, clock, pygame.font.Font(None, 36), lose_sound, lose_channel):
+            if show_game_over_screen(screen):
                 # User wants to restart, reinitialize the player and asteroid field
-                player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, laser_sound, death_sound)
+                player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
                 asteroid_field = AsteroidField()
             else:
                 # User wants to quit
@@ -242,6 +398,12 @@ def main():
             # Normal exit or window close
             running = False
     
+    if profiler and PROFILE_DUMP:
+        profiler.dump(PROFILE_DUMP)
+        log.info("Frame timings written to %s", PROFILE_DUMP)
+    
+    scores.backend.close()  # write out the last events
+    log.info("Scores: %s", scores.backend.stats())
     pygame.quit()
 
 
@@ -0,0 +1,688 @@
+#!/usr/bin/env python3
+"""Server-authoritative multiplayer over UDP.
+
+The server owns one World with a Player per connected client and runs the
+whole simulation: spawning, splitting and collisions. Clients only send
+their held keys. Every NET_SNAPSHOT_INTERVAL steps the server sends each
+client a snapshot of every ship, asteroid and shot.
+
+Snapshots are quantized (positions to 1/8 px, rotation to 16 bits) and
+delta compressed: each one is encoded against the last snapshot the
+client acknowledged, so only removed entities and changed fields are
+sent, small moves as one signed byte per axis. A client that acked
+nothing recent gets a full snapshot.
+
+Clients predict their own ship by running Player.update on their inputs
+right away and correct it when a snapshot says which input the server
+got to; everything else is drawn NET_INTERP_DELAY in the past,
+interpolated between the two snapshots around that time.
+
+    python net.py server                      # listen on NET_PORT
+    python net.py client --host 127.0.0.1     # play in a window
+    python net.py loadtest --players 1 2 4 8  # bandwidth and tick cost per player count
+"""
+import collections
+import math
+import random
+import select
+import socket
+import struct
+import time
+import pygame
+from constants import *
+from player import Player, ship_triangle
+from asteroidfield import AsteroidField
+from replay import KEYS, MaskKeys, key_mask
+from world import World, asteroid_pool, shot_pool
+import log
+
+# Message types, the first byte of every packet
+HELLO = 1      # client -> server: let me in
+WELCOME = 2    # server -> client: your player id, tick rate and snapshot interval
+INPUT = 3      # client -> server: acked snapshot tick and the newest few key masks
+SNAPSHOT = 4   # server -> client: the world, as a delta against an acked snapshot
+BYE = 5        # client -> server: leaving
+
+WELCOME_MESSAGE = struct.Struct("<BBBB")     # type, player id, tick rate, snapshot interval
+INPUT_MESSAGE = struct.Struct("<BIIB")       # type, acked tick, newest input number, mask count
+SNAPSHOT_HEADER = struct.Struct("<BIII")     # type, tick, baseline tick, last input number used
+COUNT = struct.Struct("<H")
+ENTITY_ID = struct.Struct("<H")
+POSITION = struct.Struct("<HH")
+SMALL_MOVE = struct.Struct("<bb")
+ROTATION = struct.Struct("<H")
+
+NO_TICK = 0xFFFFFFFF       # baseline of a full snapshot, or nothing acked yet
+HISTORY_TICKS = 120        # how far back a snapshot can still serve as a baseline
+INPUT_REDUNDANCY = 3       # key masks per input packet, so one lost packet loses nothing
+MAX_QUEUED_INPUTS = 8      # inputs the server holds per client before dropping old ones
+MAX_PACKET = 65507
+
+# Entity kinds
+SHIP = 0
+ASTEROID = 1
+SHOT = 2
+
+# Field bits of an entity update, fields follow in this order
+KIND = 1
+POSITION_CHANGED = 2
+POSITION_MOVED = 4         # position as a small move from the baseline instead
+ROTATION_CHANGED = 8
+RADIUS = 16
+OWNER = 32
+STATUS = 64
+
+POSITION_SCALE = 8         # quantization steps per pixel
+POSITION_MARGIN = 128      # pixels outside the screen that still quantize correctly
+SHOOT_MASK = 1 << KEYS.index(pygame.K_SPACE)
+INVULNERABLE_FLAG = 0x10   # status byte: lives in the low bits, this while invulnerable
+
+KEY_STATES = [MaskKeys(mask) for mask in range(1 << len(KEYS))]
+KEY_MASK = len(KEY_STATES) - 1  # bits of a mask byte that are keys
+
+
+def quantize(sprite, kind, owner=0, status=0):
+    """The network form of a sprite: (kind, x, y, rotation, radius, owner, status)"""
+    position = sprite.position
+    x = min(max(round((position.x + POSITION_MARGIN) * POSITION_SCALE), 0), 0xFFFF)
+    y = min(max(round((position.y + POSITION_MARGIN) * POSITION_SCALE), 0), 0xFFFF)
+    rotation = round(getattr(sprite, "rotation", 0) % 360 * 0x10000 / 360) & 0xFFFF
+    return (kind, x, y, rotation, int(sprite.radius), owner, status)
+
+
+def dequantize(values):
+    """Back to pixels and degrees: (kind, x, y, rotation, radius, owner, status)"""
+    kind, x, y, rotation, radius, owner, status = values
+    return (kind, x / POSITION_SCALE - POSITION_MARGIN, y / POSITION_SCALE - POSITION_MARGIN,
+            rotation * 360 / 0x10000, radius, owner, status)
+
+
+def encode_entities(state, baseline):
+    """Removed ids and changed fields of `state` relative to `baseline` (both id -> values)"""
+    removed = [entity_id for entity_id in baseline if entity_id not in state]
+    out = bytearray(COUNT.pack(len(removed)))
+    for entity_id in removed:
+        out += ENTITY_ID.pack(entity_id)
+
+    updates = bytearray()
+    count = 0
+    for entity_id, values in state.items():
+        old = baseline.get(entity_id)
+        if old == values:
+            continue
+        kind, x, y, rotation, radius, owner, status = values
+        mask = 0
+        fields = bytearray()
+        if old is None or kind != old[0]:
+            mask |= KIND
+            fields.append(kind)
+        if old is None or x != old[1] or y != old[2]:
+            if old is not None and -128 <= x - old[1] < 128 and -128 <= y - old[2] < 128:
+                mask |= POSITION_MOVED
+                fields += SMALL_MOVE.pack(x - old[1], y - old[2])
+            else:
+                mask |= POSITION_CHANGED
+                fields += POSITION.pack(x, y)
+        if old is None or rotation != old[3]:
+            mask |= ROTATION_CHANGED
+            fields += ROTATION.pack(rotation)
+        for bit, index in ((RADIUS, 4), (OWNER, 5), (STATUS, 6)):
+            if old is None or values[index] != old[index]:
+                mask |= bit
+                fields.append(values[index])
+        updates += ENTITY_ID.pack(entity_id)
+        updates.append(mask)
+        updates += fields
+        count += 1
+    out += COUNT.pack(count)
+    out += updates
+    return bytes(out)
+
+
+def decode_entities(data, offset, baseline):
+    """Inverse of encode_entities, returns the new id -> values dict"""
+    state = dict(baseline)
+    (removed,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(removed):
+        (entity_id,) = ENTITY_ID.unpack_from(data, offset)
+        offset += ENTITY_ID.size
+        state.pop(entity_id, None)
+
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        (entity_id,) = ENTITY_ID.unpack_from(data, offset)
+        mask = data[offset + ENTITY_ID.size]
+        offset += ENTITY_ID.size + 1
+        values = list(state.get(entity_id, (0, 0, 0, 0, 0, 0, 0)))
+        if mask & KIND:
+            values[0] = data[offset]
+            offset += 1
+        if mask & POSITION_CHANGED:
+            values[1], values[2] = POSITION.unpack_from(data, offset)
+            offset += POSITION.size
+        elif mask & POSITION_MOVED:
+            dx, dy = SMALL_MOVE.unpack_from(data, offset)
+            values[1] += dx
+            values[2] += dy
+            offset += SMALL_MOVE.size
+        if mask & ROTATION_CHANGED:
+            (values[3],) = ROTATION.unpack_from(data, offset)
+            offset += ROTATION.size
+        for bit, index in ((RADIUS, 4), (OWNER, 5), (STATUS, 6)):
+            if mask & bit:
+                values[index] = data[offset]
+                offset += 1
+        state[entity_id] = tuple(values)
+    return state
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else 0
+
+
+class RemoteClient:
+    """Server-side state of one connected client"""
+    def __init__(self, address, player_id, player):
+        self.address = address
+        self.player_id = player_id
+        self.player = player
+        self.inputs = collections.deque()  # (input number, mask) not used yet
+        self.mask = 0
+        self.newest_input = 0      # highest input number received
+        self.processed_input = 0   # input number used in the last step
+        self.acked_tick = NO_TICK
+        self.last_heard = time.monotonic()
+        self.bytes_sent = 0
+        self.full_snapshots = 0
+        self.delta_snapshots = 0
+        player.controls = self.controls
+
+    def controls(self):
+        return KEY_STATES[self.mask]
+
+
+class Server:
+    """Runs the shared world and sends snapshots to every client"""
+    def __init__(self, host="127.0.0.1", port=NET_PORT, tick_rate=SIM_TICK_RATE,
+                 snapshot_interval=NET_SNAPSHOT_INTERVAL, seed=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+        self.tick_rate = tick_rate
+        self.dt = 1 / tick_rate
+        self.snapshot_interval = snapshot_interval
+
+        self.world = World()
+        self.world.activate()
+        self.asteroid_field = AsteroidField()
+        self.world.reset(None, self.asteroid_field, seed)
+
+        self.clients = {}          # address -> RemoteClient
+        self.tick_count = 0
+        self.history = {}          # tick -> id -> values, the baselines for delta encoding
+        self.net_ids = {}          # sprite -> entity id, as of the last snapshot
+        self.next_net_id = 0
+        # A pooled sprite comes back as a new entity, so it gets a new id
+        for pool in (asteroid_pool, shot_pool):
+            pool.release_hooks.append(self.forget)
+        self.deaths = 0
+        self.step_times = collections.deque(maxlen=3600)      # ns per simulation step
+        self.snapshot_times = collections.deque(maxlen=3600)  # ns per snapshot round (all clients)
+        log.info("Server listening on %s:%s", *self.address)
+
+    def close(self):
+        for pool in (asteroid_pool, shot_pool):
+            pool.release_hooks.remove(self.forget)
+        self.sock.close()
+
+    def forget(self, sprite):
+        self.net_ids.pop(sprite, None)
+
+    def poll(self):
+        """Handle every packet waiting on the socket"""
+        while True:
+            try:
+                data, address = self.sock.recvfrom(MAX_PACKET)
+            except BlockingIOError:
+                return
+            except ConnectionResetError:
+                continue  # a client went away (Windows reports it on the next read)
+            if not data:
+                continue
+            client = self.clients.get(address)
+            if data[0] == HELLO:
+                self.join(address)
+            elif data[0] == INPUT and client and len(data) >= INPUT_MESSAGE.size:
+                self.receive_input(client, data)
+            elif data[0] == BYE and client:
+                self.leave(client)
+
+    def join(self, address):
+        client = self.clients.get(address)
+        if client is None:
+            used = {client.player_id for client in self.clients.values()}
+            player_id = next((number for number in range(1, 256) if number not in used), None)
+            if player_id is None:
+                return  # full
+            self.world.activate()
+            client = RemoteClient(address, player_id, Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+            self.clients[address] = client
+            log.info("Player %s joined from %s:%s", player_id, *address)
+        client.last_heard = time.monotonic()
+        self.send(client, WELCOME_MESSAGE.pack(WELCOME, client.player_id, self.tick_rate, self.snapshot_interval))
+
+    def leave(self, client):
+        client.player.kill()
+        del self.clients[client.address]
+        log.info("Player %s left", client.player_id)
+
+    def receive_input(self, client, data):
+        _, acked_tick, newest, count = INPUT_MESSAGE.unpack_from(data)
+        client.last_heard = time.monotonic()
+        if acked_tick != NO_TICK and (client.acked_tick == NO_TICK or acked_tick > client.acked_tick):
+            client.acked_tick = acked_tick
+        masks = data[INPUT_MESSAGE.size:INPUT_MESSAGE.size + count]
+        first = newest - len(masks) + 1
+        for number, mask in enumerate(masks, first):
+            if number > client.newest_input:
+                client.inputs.append((number, mask & KEY_MASK))  # unknown bits from a bad packet are dropped
+        client.newest_input = max(client.newest_input, newest)
+        while len(client.inputs) > MAX_QUEUED_INPUTS:
+            client.inputs.popleft()  # fell behind, don't let the latency grow
+
+    def tick(self):
+        """One simulation step, plus a snapshot every snapshot_interval steps"""
+        start = time.perf_counter_ns()
+        world = self.world
+        world.activate()
+        # One input per client per step, repeating the last one if none arrived
+        for client in self.clients.values():
+            if client.inputs:
+                client.processed_input, client.mask = client.inputs.popleft()
+
+        world.move(self.dt)
+        for client in self.clients.values():
+            if world.check_player_collisions(client.player):
+                self.respawn(client.player)
+        world.check_shot_collisions()
+        self.tick_count += 1
+        self.step_times.append(time.perf_counter_ns() - start)
+
+        if self.tick_count % self.snapshot_interval == 0:
+            start = time.perf_counter_ns()
+            self.send_snapshots()
+            self.snapshot_times.append(time.perf_counter_ns() - start)
+        self.drop_silent_clients()
+
+    def respawn(self, player):
+        """Out of lives: back in the middle with a full set"""
+        self.deaths += 1
+        player.lives = 3
+        player.position = pygame.Vector2(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        player.invulnerable = 3.0
+
+    def capture(self):
+        """The world as id -> quantized values"""
+        state = {}
+        net_ids = {}
+        sprites = [(client.player, SHIP, client.player_id,
+                    client.player.lives | (INVULNERABLE_FLAG if client.player.invulnerable > 0 else 0))
+                   for client in self.clients.values()]
+        sprites += [(asteroid, ASTEROID, 0, 0) for asteroid in self.world.asteroids]
+        sprites += [(shot, SHOT, 0, 0) for shot in self.world.shots]
+        taken = None  # ids in use, only gathered once a new id is needed
+        for sprite, kind, owner, status in sprites:
+            entity_id = self.net_ids.get(sprite)
+            if entity_id is None:
+                if taken is None:
+                    taken = set(self.net_ids.values()) | set(net_ids.values())
+                # Ids wrap around after 0xFFFF, skip the ones still in use
+                while True:
+                    self.next_net_id = self.next_net_id % 0xFFFF + 1
+                    if self.next_net_id not in taken:
+                        break
+                entity_id = self.next_net_id
+                taken.add(entity_id)
+            net_ids[sprite] = entity_id
+            state[entity_id] = quantize(sprite, kind, owner, status)
+        self.net_ids = net_ids
+        return state
+
+    def send_snapshots(self):
+        tick = self.tick_count
+        state = self.history[tick] = self.capture()
+        for old in [old for old in self.history if old < tick - HISTORY_TICKS]:
+            del self.history[old]
+
+        bodies = {}  # baseline tick -> encoded entities, shared by clients with the same baseline
+        for client in list(self.clients.values()):
+            baseline_tick = client.acked_tick if client.acked_tick in self.history else NO_TICK
+            body = bodies.get(baseline_tick)
+            if body is None:
+                body = bodies[baseline_tick] = encode_entities(state, self.history.get(baseline_tick, {}))
+            if baseline_tick == NO_TICK:
+                client.full_snapshots += 1
+            else:
+                client.delta_snapshots += 1
+            self.send(client, SNAPSHOT_HEADER.pack(SNAPSHOT, tick, baseline_tick, client.processed_input) + body)
+
+    def send(self, client, packet):
+        try:
+            self.sock.sendto(packet, client.address)
+            client.bytes_sent += len(packet)
+        except OSError as e:
+            log.warning("Could not send to player %s: %s", client.player_id, e)
+
+    def drop_silent_clients(self):
+        now = time.monotonic()
+        for client in list(self.clients.values()):
+            if now - client.last_heard > NET_TIMEOUT:
+                log.info("Player %s timed out", client.player_id)
+                self.leave(client)
+
+    def stats(self):
+        """Tick cost and per-client bandwidth so far"""
+        seconds = self.tick_count / self.tick_rate
+        bandwidth = [client.bytes_sent / seconds if seconds else 0 for client in self.clients.values()]
+        return {
+            "players": len(self.clients),
+            "ticks": self.tick_count,
+            "asteroids": len(self.world.asteroids),
+            "shots": len(self.world.shots),
+            "step_ms_mean": sum(self.step_times) / max(len(self.step_times), 1) / 1e6,
+            "step_ms_p99": percentile(self.step_times, 0.99) / 1e6,
+            "snapshot_ms_mean": sum(self.snapshot_times) / max(len(self.snapshot_times), 1) / 1e6,
+            "bytes_per_second_per_client": sum(bandwidth) / len(bandwidth) if bandwidth else 0,
+            "bytes_per_second_max": max(bandwidth, default=0),
+            "full_snapshots": sum(client.full_snapshots for client in self.clients.values()),
+            "delta_snapshots": sum(client.delta_snapshots for client in self.clients.values()),
+            "deaths": self.deaths,
+        }
+
+    def serve_forever(self, report_interval=10.0):
+        """Tick at tick_rate in real time, handling packets in between"""
+        next_tick = time.perf_counter()
+        last_report = next_tick
+        while True:
+            now = time.perf_counter()
+            if now < next_tick:
+                select.select([self.sock], [], [], next_tick - now)
+                self.poll()
+                continue
+            self.poll()
+            self.tick()
+            next_tick += self.dt
+            if now - next_tick > 0.25:
+                next_tick = now  # fell far behind, don't try to catch up
+            if now - last_report >= report_interval:
+                log.info("Server: %s", self.stats())
+                last_report = now
+
+
+class Client:
+    """Sends inputs, predicts its own ship and interpolates everything else"""
+    def __init__(self, host="127.0.0.1", port=NET_PORT):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.connect((host, port))
+        self.sock.setblocking(False)
+        self.player_id = None
+        self.dt = 1 / SIM_TICK_RATE
+        self.interp_ticks = NET_INTERP_DELAY * SIM_TICK_RATE
+
+        # The predicted ship lives in a world of its own, never shoots and never collides
+        self.world = World()
+        self.world.activate()
+        self.ship = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        self.ship.controls = self.controls
+        self.keys = KEY_STATES[0]
+
+        self.input_number = 0
+        self.pending = collections.deque(maxlen=HISTORY_TICKS)  # [input number, mask, predicted x, y]
+        self.snapshots = {}         # tick -> id -> values
+        self.latest_tick = None
+        self.clock = 0.0            # estimate of the server's current tick
+        self.ticks = 0
+        self.loss = 0.0             # fraction of packets to drop on arrival, for testing
+        self.rng = random.Random()
+        self.bytes_received = 0
+        self.prediction_errors = collections.deque(maxlen=3600)  # px between prediction and server
+
+    def close(self):
+        try:
+            self.sock.send(bytes((BYE,)))
+        except OSError:
+            pass
+        self.sock.close()
+
+    def send(self, packet):
+        try:
+            self.sock.send(packet)
+        except OSError:
+            pass  # server not up (yet), the next tick tries again
+
+    def tick(self, mask):
+        """Send this step's held keys (a replay.key_mask) and move the predicted ship"""
+        self.ticks += 1
+        self.clock += 1
+        if self.player_id is None:
+            if self.ticks % SIM_TICK_RATE == 1:
+                self.send(bytes((HELLO,)))
+            return
+
+        self.input_number += 1
+        self.predict(mask)
+        self.pending.append([self.input_number, mask, self.ship.position.x, self.ship.position.y])
+        masks = bytes(entry[1] for entry in list(self.pending)[-INPUT_REDUNDANCY:])
+        acked = self.latest_tick if self.latest_tick is not None else NO_TICK
+        self.send(INPUT_MESSAGE.pack(INPUT, acked, self.input_number, len(masks)) + masks)
+
+    def controls(self):
+        return self.keys
+
+    def predict(self, mask):
+        self.keys = KEY_STATES[mask & ~SHOOT_MASK]  # only the server makes shots
+        self.world.activate()  # the ship's timers are on this world's wheel
+        self.ship.update(self.dt)
+        self.world.advance_timers(self.dt)
+
+    def poll(self):
+        """Handle every packet waiting on the socket"""
+        while True:
+            try:
+                data = self.sock.recv(MAX_PACKET)
+            except BlockingIOError:
+                return
+            except ConnectionRefusedError:
+                continue  # server not up (yet)
+            if not data or (self.loss and self.rng.random() < self.loss):
+                continue
+            self.bytes_received += len(data)
+            if data[0] == WELCOME and self.player_id is None:
+                _, self.player_id, _, _ = WELCOME_MESSAGE.unpack_from(data)
+                log.info("Joined as player %s", self.player_id)
+            elif data[0] == SNAPSHOT and self.player_id is not None:
+                self.receive_snapshot(data)
+
+    def receive_snapshot(self, data):
+        _, tick, baseline_tick, processed_input = SNAPSHOT_HEADER.unpack_from(data)
+        if self.latest_tick is not None and tick <= self.latest_tick:
+            return  # late or duplicate
+        if baseline_tick == NO_TICK:
+            baseline = {}
+        else:
+            baseline = self.snapshots.get(baseline_tick)
+            if baseline is None:
+                return  # can't decode it, the next snapshot will use an older baseline
+        state = self.snapshots[tick] = decode_entities(data, SNAPSHOT_HEADER.size, baseline)
+        for old in [old for old in self.snapshots if old < tick - HISTORY_TICKS]:
+            del self.snapshots[old]
+        self.latest_tick = tick
+        self.clock = max(self.clock, tick)
+        self.reconcile(state, processed_input)
+
+    def reconcile(self, state, processed_input):
+        """Move the predicted ship to where the server has it and replay the newer inputs"""
+        own = next((values for values in state.values()
+                    if values[0] == SHIP and values[5] == self.player_id), None)
+        if own is None:
+            return
+        _, x, y, rotation, _, _, status = dequantize(own)
+        while self.pending and self.pending[0][0] <= processed_input:
+            number, _, predicted_x, predicted_y = self.pending.popleft()
+            if number == processed_input:
+                self.prediction_errors.append(math.hypot(predicted_x - x, predicted_y - y))
+        ship = self.ship
+        ship.position = pygame.Vector2(x, y)
+        ship.rotation = rotation
+        ship.lives = status & 0x0F
+        for entry in self.pending:
+            self.predict(entry[1])
+            entry[2] = ship.position.x
+            entry[3] = ship.position.y
+        self.world.activate()
+        ship.invulnerable = 1.0 if status & INVULNERABLE_FLAG else 0
+
+    def view(self):
+        """Every entity to draw as dequantized (kind, x, y, rotation, radius, owner, status)"""
+        if self.latest_tick is None:
+            return []
+        render_tick = min(self.clock - self.interp_ticks, self.latest_tick)
+        before = max((tick for tick in self.snapshots if tick <= render_tick), default=None)
+        after = min((tick for tick in self.snapshots if tick > render_tick), default=None)
+        if before is None:
+            before, after = min(self.snapshots), None
+        a = self.snapshots[before]
+        b = self.snapshots[after] if after is not None else None
+        t = (render_tick - before) / (after - before) if b is not None else 0.0
+
+        entities = []
+        for entity_id, values in a.items():
+            if values[0] == SHIP and values[5] == self.player_id:
+                continue
+            if b is not None:
+                target = b.get(entity_id)
+                if target is None:
+                    continue  # gone in the next snapshot
+                values = self.interpolate(values, target, t)
+            else:
+                values = dequantize(values)
+            entities.append(values)
+        ship = self.ship
+        entities.append((SHIP, ship.position.x, ship.position.y, ship.rotation, ship.radius,
+                         self.player_id, ship.lives | (INVULNERABLE_FLAG if ship.invulnerable > 0 else 0)))
+        return entities
+
+    @staticmethod
+    def interpolate(a, b, t):
+        a = dequantize(a)
+        b = dequantize(b)
+        if a[0] != b[0] or a[4] != b[4] or abs(b[1] - a[1]) > SCREEN_WIDTH / 2 or abs(b[2] - a[2]) > SCREEN_HEIGHT / 2:
+            return b  # a different entity in a reused slot, or a wrap: don't slide across the screen
+        turn = (b[3] - a[3] + 180) % 360 - 180
+        return (a[0], a[1] + (b[1] - a[1]) * t, a[2] + (b[2] - a[2]) * t, (a[3] + turn * t) % 360,
+                b[4], b[5], b[6])
+
+    def draw(self, screen):
+        for kind, x, y, rotation, radius, owner, status in self.view():
+            if kind == SHIP:
+                if status & INVULNERABLE_FLAG and time.perf_counter() * 10 % 2 < 1:
+                    continue  # blink like the local game
+                color = "white" if owner == self.player_id else "cyan"
+                pygame.draw.polygon(screen, color, ship_triangle(pygame.Vector2(x, y), rotation, radius), 2)
+            elif kind == ASTEROID:
+                pygame.draw.circle(screen, "brown", (int(x), int(y)), radius)
+            else:
+                pygame.draw.circle(screen, "yellow", (int(x), int(y)), radius)
+
+
+def run_client(host, port):
+    """Play on a server in a window"""
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    clock = pygame.time.Clock()
+    font = pygame.font.Font(None, 36)
+    client = Client(host, port)
+    try:
+        while not any(event.type == pygame.QUIT for event in pygame.event.get()):
+            client.tick(key_mask(pygame.key.get_pressed()))
+            client.poll()
+            screen.fill((0, 0, 0))
+            client.draw(screen)
+            screen.blit(font.render(f"Lives: {client.ship.lives}", True, (255, 255, 255)), (20, 20))
+            pygame.display.flip()
+            clock.tick(SIM_TICK_RATE)
+    finally:
+        client.close()
+        pygame.quit()
+
+
+def loadtest(player_counts, seconds=10, loss=0.0, seed=0):
+    """Run a server and random-pilot clients over localhost for each player count
+
+    Everything steps in lockstep as fast as it can, so bandwidth is per
+    simulated second. Returns one stats dict per player count.
+    """
+    from headless import RandomControls
+
+    results = []
+    for count in player_counts:
+        server = Server(port=0, seed=seed)
+        clients = [Client(*server.address) for _ in range(count)]
+        pilots = [RandomControls(rng=random.Random(seed + index)) for index in range(count)]
+        for index, client in enumerate(clients):
+            client.loss = loss
+            client.rng.seed(seed + index)
+        for _ in range(int(seconds * SIM_TICK_RATE)):
+            for client, pilot in zip(clients, pilots):
+                client.tick(key_mask(pilot()))
+            server.poll()
+            server.tick()
+            for client in clients:
+                client.poll()
+        stats = server.stats()
+        errors = [error for client in clients for error in client.prediction_errors]
+        stats["prediction_error_px_mean"] = sum(errors) / len(errors) if errors else 0.0
+        stats["prediction_error_px_p99"] = percentile(errors, 0.99)
+        results.append(stats)
+        for client in clients:
+            client.close()
+        server.close()
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Multiplayer server, client and load test")
+    commands = parser.add_subparsers(dest="command", required=True)
+    server_parser = commands.add_parser("server", help="run the authoritative server")
+    server_parser.add_argument("--host", default="0.0.0.0")
+    server_parser.add_argument("--port", type=int, default=NET_PORT)
+    client_parser = commands.add_parser("client", help="join a server in a window")
+    client_parser.add_argument("--host", default="127.0.0.1")
+    client_parser.add_argument("--port", type=int, default=NET_PORT)
+    load_parser = commands.add_parser("loadtest", help="measure bandwidth and tick cost over localhost")
+    load_parser.add_argument("--players", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    load_parser.add_argument("--seconds", type=float, default=10, help="simulated seconds per player count")
+    load_parser.add_argument("--loss", type=float, default=0.0, help="fraction of packets clients drop")
+    load_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "server":
+        Server(args.host, args.port).serve_forever()
+    elif args.command == "client":
+        run_client(args.host, args.port)
+    else:
+        log.set_level(log.WARNING)
+        print(f"{'players':>7} {'step ms':>8} {'p99 ms':>8} {'snap ms':>8} {'B/s/client':>11} "
+              f"{'entities':>9} {'pred err px':>12}")
+        for stats in loadtest(args.players, args.seconds, args.loss, args.seed):
+            print(f"{stats['players']:>7} {stats['step_ms_mean']:>8.3f} {stats['step_ms_p99']:>8.3f} "
+                  f"{stats['snapshot_ms_mean']:>8.3f} {stats['bytes_per_second_per_client']:>11.0f} "
+                  f"{stats['asteroids'] + stats['shots'] + stats['players']:>9} "
+                  f"{stats['prediction_error_px_mean']:>12.3f}")
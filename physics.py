@@ -0,0 +1,226 @@
+import pygame
+from constants import *
+from asteroid import Asteroid
+from shot import Shot
+from registry import Entity
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, objects fall back to their own update()
+    np = None
+
+
+class BodyArrays:
+    """Positions, velocities and radii of one kind of body in contiguous arrays"""
+    def __init__(self, capacity=256):
+        self.positions = np.zeros((capacity, 2))
+        self.previous = np.zeros((capacity, 2))  # positions before the last step, see save_previous()
+        self.velocities = np.zeros((capacity, 2))
+        self.radii = np.zeros(capacity)
+        self.bodies = []  # slot -> body, rows past len(bodies) are unused
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def add(self, body):
+        slot = len(self.bodies)
+        if slot == len(self.radii):
+            self.grow()
+        self.positions[slot] = body._position
+        self.previous[slot] = body._previous
+        self.velocities[slot] = body._velocity
+        self.radii[slot] = body._radius
+        self.bodies.append(body)
+        body._slot = slot
+
+    def remove(self, body):
+        # Swap the last body into the freed slot so the arrays stay packed,
+        # after copying this body's state out of it
+        slot = body._slot
+        body.detach()
+        last = len(self.bodies) - 1
+        if slot != last:
+            moved = self.bodies[last]
+            self.positions[slot] = self.positions[last]
+            self.previous[slot] = self.previous[last]
+            self.velocities[slot] = self.velocities[last]
+            self.radii[slot] = self.radii[last]
+            self.bodies[slot] = moved
+            moved._slot = slot
+        self.bodies.pop()
+
+    def clear(self):
+        for body in self.bodies:
+            body.detach()
+        self.bodies.clear()
+
+    def grow(self):
+        capacity = len(self.radii) * 2
+        self.positions = np.resize(self.positions, (capacity, 2))
+        self.previous = np.resize(self.previous, (capacity, 2))
+        self.velocities = np.resize(self.velocities, (capacity, 2))
+        self.radii = np.resize(self.radii, capacity)
+
+    def save_previous(self):
+        """save_previous() of every body in one copy"""
+        count = len(self.bodies)
+        self.previous[:count] = self.positions[:count]
+
+    def max_speed(self):
+        count = len(self.bodies)
+        if not count:
+            return 0
+        velocities = self.velocities[:count]
+        return np.sqrt((velocities * velocities).sum(axis=1)).max().item()
+
+    def cells(self, bodies, cell_size):
+        """The SpatialHash cell of each of `bodies`, in the same order"""
+        slots = [body._slot for body in bodies]
+        cells = np.floor(self.positions[slots] / cell_size).astype(np.int64)
+        return list(map(tuple, cells.tolist()))
+
+
+class ArrayBody:
+    """Mixin turning a CircleShape into a view over a row of a BodyArrays
+
+    The classes using it declare the _slot, _position, _previous, _velocity
+    and _radius slots, a mixin with slots of its own can't be combined with
+    CircleShape's.
+    """
+    __slots__ = ()
+    arrays = None  # set by PhysicsKernel
+
+    def __init__(self, *args):
+        self._slot = None  # row in the arrays, None while not registered
+        super().__init__(*args)
+        self.arrays.add(self)
+
+    def reset(self, *args):
+        super().reset(*args)
+        self.arrays.add(self)
+
+    # While registered the arrays hold the state; before that (during
+    # __init__) and after kill() the plain attributes are used instead
+    @property
+    def position(self):
+        if self._slot is None:
+            return self._position
+        return pygame.Vector2(self.arrays.positions[self._slot].tolist())
+
+    @position.setter
+    def position(self, value):
+        if self._slot is None:
+            self._position = pygame.Vector2(value)
+        else:
+            self.arrays.positions[self._slot] = value
+
+    @property
+    def previous_position(self):
+        if self._slot is None:
+            return self._previous
+        return pygame.Vector2(self.arrays.previous[self._slot].tolist())
+
+    @previous_position.setter
+    def previous_position(self, value):
+        if self._slot is None:
+            self._previous = pygame.Vector2(value)
+        else:
+            self.arrays.previous[self._slot] = value
+
+    @property
+    def velocity(self):
+        if self._slot is None:
+            return self._velocity
+        return pygame.Vector2(self.arrays.velocities[self._slot].tolist())
+
+    @velocity.setter
+    def velocity(self, value):
+        if self._slot is None:
+            self._velocity = pygame.Vector2(value)
+        else:
+            self.arrays.velocities[self._slot] = value
+
+    @property
+    def radius(self):
+        if self._slot is None:
+            return self._radius
+        return self.arrays.radii[self._slot].item()
+
+    @radius.setter
+    def radius(self, value):
+        if self._slot is None:
+            self._radius = value
+        else:
+            self.arrays.radii[self._slot] = value
+
+    def detach(self):
+        """Copy the state out of the arrays and stop being a view"""
+        slot = self._slot
+        self._position = pygame.Vector2(self.arrays.positions[slot].tolist())
+        self._previous = pygame.Vector2(self.arrays.previous[slot].tolist())
+        self._velocity = pygame.Vector2(self.arrays.velocities[slot].tolist())
+        self._radius = self.arrays.radii[slot].item()
+        self._slot = None
+
+    def kill(self):
+        if self._slot is not None:
+            self.arrays.remove(self)  # detaches it too
+        super().kill()
+
+    def update(self, dt):
+        # Moved in bulk by PhysicsKernel.update
+        pass
+
+
+class ArrayAsteroid(ArrayBody, Asteroid):
+    __slots__ = ("_slot", "_position", "_previous", "_velocity", "_radius")
+
+
+class ArrayShot(ArrayBody, Shot):
+    __slots__ = ("_slot", "_position", "_previous", "_velocity", "_radius")
+
+
+class PhysicsKernel(Entity):
+    """Moves every ArrayAsteroid and ArrayShot with a few batched NumPy operations"""
+    def __init__(self, capacity=256):
+        super().__init__()
+        self.asteroids = BodyArrays(capacity)
+        self.shots = BodyArrays(capacity)
+        ArrayAsteroid.arrays = self.asteroids
+        ArrayShot.arrays = self.shots
+
+    def clear(self):
+        self.asteroids.clear()
+        self.shots.clear()
+
+    def save_previous(self):
+        self.asteroids.save_previous()
+        self.shots.save_previous()
+
+    def update(self, dt):
+        # Asteroids: integrate and wrap around the screen edges
+        count = len(self.asteroids)
+        if count:
+            positions = self.asteroids.positions[:count]
+            positions += self.asteroids.velocities[:count] * dt
+            x = positions[:, 0]
+            y = positions[:, 1]
+            x_low, x_high = x < 0, x > SCREEN_WIDTH
+            y_low, y_high = y < 0, y > SCREEN_HEIGHT
+            x[x_low] = SCREEN_WIDTH
+            x[x_high] = 0
+            y[y_low] = SCREEN_HEIGHT
+            y[y_high] = 0
+
+        # Shots: integrate and remove the ones that left the screen
+        count = len(self.shots)
+        if count:
+            positions = self.shots.positions[:count]
+            positions += self.shots.velocities[:count] * dt
+            x = positions[:, 0]
+            y = positions[:, 1]
+            off_screen = (x < 0) | (x > SCREEN_WIDTH) | (y < 0) | (y > SCREEN_HEIGHT)
+            # Highest slots first so swap-removal never moves a pending slot
+            bodies = self.shots.bodies
+            for slot in np.flatnonzero(off_screen)[::-1]:
+                bodies[slot].kill()
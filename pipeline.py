@@ -0,0 +1,133 @@
+"""Simulation on its own thread, one frame ahead of the renderer.
+
+Each frame the main thread hands the simulation thread that frame's keys
+and frame time, then draws the previous frame's Snapshot while the next
+one is simulated. Snapshots are immutable (tuples of views that only know
+how to blit themselves), so the two threads never share a mutable object.
+There are two snapshots alive at a time, the one being drawn and the one
+being built, and the simulation is never more than one frame ahead, so
+the screen shows input one frame later than the serial loop does.
+
+How much of the two threads' work actually runs at the same time depends
+on how much of it releases the GIL (blits, scaling and the flip mostly
+do, Python code doesn't), stats() reports it.
+"""
+import collections
+import queue
+import threading
+import time
+import pygame
+import audio
+
+Snapshot = collections.namedtuple("Snapshot", "frame lives sprites game_over")
+
+
+class SimPipeline:
+    """Runs the world's fixed steps on a simulation thread and hands back Snapshots
+
+    Call start(), then each frame request() before drawing `snapshot` and
+    collect() after the flip, and stop() when the game loop ends.
+    """
+    def __init__(self, world, player, timestep, recorder=None):
+        self.world = world
+        self.player = player
+        self.timestep = timestep
+        self.recorder = recorder
+        self.requests = queue.Queue(maxsize=1)  # (keys, frame time), or None to stop
+        self.results = queue.Queue(maxsize=1)   # (snapshot or exception, work start, work end)
+        self.keys = None
+        self.thread = None
+        self.snapshot = None   # the newest finished frame, the one to draw next
+        self.frame = 0
+        self.render_start = 0.0
+        self.sim_time = 0.0    # seconds of work on each side and of both at once, see stats()
+        self.render_time = 0.0
+        self.overlap_time = 0.0
+        self.stall_time = 0.0  # main thread waiting for the simulation to finish
+
+    def start(self):
+        # The simulation reads the keys sampled by the main thread. A recorder
+        # already wraps the player's controls, so its source is replaced instead.
+        self.keys = pygame.key.get_pressed()
+        if self.recorder:
+            self.recorder.source = self.controls
+        else:
+            self.player.controls = self.controls
+        self.snapshot = self.capture(False)  # so the first frame has something to draw
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.requests.put(None)
+        self.thread.join()
+
+    def controls(self):
+        return self.keys
+
+    def request(self, keys, frame_time):
+        """Start simulating the next frame, the caller draws `snapshot` meanwhile"""
+        self.render_start = time.perf_counter()
+        self.requests.put((keys, frame_time))
+
+    def collect(self):
+        """Wait for the frame asked for by request() and return its snapshot"""
+        render_end = time.perf_counter()
+        snapshot, sim_start, sim_end = self.results.get()
+        if isinstance(snapshot, Exception):
+            raise snapshot
+        self.stall_time += time.perf_counter() - render_end
+        self.sim_time += sim_end - sim_start
+        self.render_time += render_end - self.render_start
+        self.overlap_time += max(0.0, min(sim_end, render_end) - max(sim_start, self.render_start))
+        self.snapshot = snapshot
+        return snapshot
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            start = time.perf_counter()
+            try:
+                snapshot = self.simulate(*request)
+            except Exception as e:
+                self.results.put((e, start, time.perf_counter()))
+                return
+            self.results.put((snapshot, start, time.perf_counter()))
+
+    def simulate(self, keys, frame_time):
+        self.keys = keys
+        world, player, timestep, recorder = self.world, self.player, self.timestep, self.recorder
+        game_over = False
+        for _ in range(timestep.advance(frame_time)):
+            game_over = world.update(player, timestep.dt)
+            if recorder:
+                recorder.end_step(timestep.dt, player, world.asteroids, world.shots)
+            if game_over:
+                break
+        audio.flush()
+        return self.capture(game_over)
+
+    def capture(self, game_over):
+        """Snapshot of the world as the renderer should show it now"""
+        alpha = self.timestep.alpha
+        sprites = []
+        for sprite in self.world.drawable:
+            view = sprite.view(alpha)
+            if view:
+                sprites.append(view)
+        self.frame += 1
+        return Snapshot(self.frame, self.player.lives, tuple(sprites), game_over)
+
+    def stats(self):
+        frames = max(1, self.frame - 1)
+        # Overlap as a share of what could overlap at most: all of the shorter side
+        shorter = min(self.sim_time, self.render_time)
+        return {
+            "frames": self.frame - 1,
+            "sim_ms": self.sim_time / frames * 1000,
+            "render_ms": self.render_time / frames * 1000,
+            "overlap_ms": self.overlap_time / frames * 1000,
+            "stall_ms": self.stall_time / frames * 1000,
+            "overlap": self.overlap_time / shorter if shorter else 0.0,
+        }
@@ -1,30 +1,86 @@
 import pygame
 from constants import *
 from circleshape import CircleShape
+from shot import Shot
+from views import ShipView
+import log
+import audio
+import scores
+
+
+def ship_triangle(position, rotation, radius):
+    """Corners of the ship outline centred on position"""
+    forward = pygame.Vector2(0, 1).rotate(rotation)
+    right = pygame.Vector2(0, 1).rotate(rotation + 90) * radius / 1.5
+    a = position + forward * radius
+    b = position - forward * radius - right
+    c = position - forward * radius + right
+    return [a, b, c]
 
 
 class Player(CircleShape):
-    def __init__(self, x, y, laser_sound=None, death_sound=None):
+    __slots__ = ("rotation", "cooldown_timer", "lives", "invulnerable_timer", "controls")
+    shot_type = Shot  # class used for new shots, replaced in world.py
+
+    def __init__(self, x, y):
         super().__init__(x, y, PLAYER_RADIUS)
         self.rotation = 0
-        self.shot_cooldown = 0  # Cooldown timer for shooting
-        self.laser_sound = laser_sound  # Sound effect for shooting
-        self.death_sound = death_sound  # Sound effect for death
+        self.cooldown_timer = None  # Timer until the next shot is allowed
         self.lives = 3  # Player starts with 3 lives
-        self.invulnerable = 0  # Invulnerability timer after being hit
+        self.invulnerable_timer = None  # Timer until invulnerability after a hit ends
+        self.controls = pygame.key.get_pressed  # Returns the held keys, swapped for scripted input
+
+    @property
+    def shot_cooldown(self):
+        """Seconds until the player can shoot again"""
+        timer = self.cooldown_timer
+        return timer.remaining() if timer and not timer.cancelled else 0
+
+    @property
+    def invulnerable(self):
+        """Seconds of invulnerability left"""
+        timer = self.invulnerable_timer
+        return timer.remaining() if timer and not timer.cancelled else 0
 
-    def draw(self, screen):
+    @invulnerable.setter
+    def invulnerable(self, seconds):
+        # Scheduled on the active world's wheel (see World.activate), inf never runs out
+        if self.invulnerable_timer:
+            self.invulnerable_timer.cancel()
+        self.invulnerable_timer = self.timers.schedule(seconds, self.end_invulnerability) if seconds > 0 else None
+
+    def end_invulnerability(self):
+        self.invulnerable_timer = None
+
+    def end_cooldown(self):
+        self.cooldown_timer = None
+
+    def visible(self):
         # Make player blink when invulnerable
-        if self.invulnerable <= 0 or (self.invulnerable * 10) % 2 < 1:
-            pygame.draw.polygon(screen, "white", self.triangle(), 2)
+        return self.invulnerable <= 0 or (self.invulnerable * 10) % 2 < 1
 
-    def triangle(self):
-        forward = pygame.Vector2(0, 1).rotate(self.rotation)
-        right = pygame.Vector2(0, 1).rotate(self.rotation + 90) * self.radius / 1.5
-        a = self.position + forward * self.radius
-        b = self.position - forward * self.radius - right
-        c = self.position - forward * self.radius + right
-        return [a, b, c]
+    def draw(self, screen, alpha=1.0):
+        if self.visible():
+            pygame.draw.polygon(screen, "white", self.triangle(self.render_position(alpha)), 2)
+
+    def blit_item(self, cache, alpha=1.0):
+        if not self.visible():
+            return None
+        surface, offset = cache.ship(self.rotation)
+        position = self.render_position(alpha) * cache.scale
+        return surface, (int(position.x) - offset, int(position.y) - offset)
+
+    def view(self, alpha=1.0):
+        """Immutable copy of what blit_item would draw, for pipeline.py"""
+        if not self.visible():
+            return None
+        position = self.render_position(alpha)
+        return ShipView(position.x, position.y, self.rotation)
+
+    def triangle(self, position=None):
+        if position is None:
+            position = self.position
+        return ship_triangle(position, self.rotation, self.radius)
 
     def rotate(self, direction, dt):
         if direction == "left":
@@ -34,15 +90,8 @@ class Player(CircleShape):
         self.rotation %= 360  # Keep rotation within 0-359 degrees
 
     def update(self, dt):
-        # Update cooldown timer
-        if self.shot_cooldown > 0:
-            self.shot_cooldown -= dt
-        
-        # Update invulnerability timer
-        if self.invulnerable > 0:
-            self.invulnerable -= dt
-            
-        keys = pygame.key.get_pressed()
+        # The cooldown and invulnerability timers run on the world's timer wheel
+        keys = self.controls()
         if keys[pygame.K_a]:
             self.rotate("left", dt)
         if keys[pygame.K_d]:
@@ -53,7 +102,7 @@ class Player(CircleShape):
             self.move(-dt)
         if keys[pygame.K_SPACE] and self.shot_cooldown <= 0:
             self.shoot()
-            self.shot_cooldown = 0.3  # 300 ms cooldown between shots
+            self.cooldown_timer = self.timers.schedule(0.3, self.end_cooldown)  # 300 ms cooldown between shots
 
     def move(self, dt):
         forward = pygame.Vector2(0, 1).rotate(self.rotation)
@@ -69,42 +118,33 @@ class Player(CircleShape):
             self.position.y = 0
 
     def shoot(self):
-        from shot import Shot
-        
         # Calculate the position for the shot (at the front of the player)
         forward = pygame.Vector2(0, 1).rotate(self.rotation)
         shot_pos = self.position + forward * self.radius  # Start at the tip of the player triangle
         
-        # Create the shot - this will automatically add it to the sprite groups
-        # because Shot.containers is defined in main.py
-        shot = Shot(shot_pos.x, shot_pos.y, self.rotation)
+        # Create the shot - this will automatically add it to the active world's
+        # registry (see World.activate)
+        shot = self.shot_type.create(shot_pos.x, shot_pos.y, self.rotation)
         
-        # Play laser sound effect if available
-        if self.laser_sound:
-            self.laser_sound.play()
+        audio.post(audio.LASER)
+        scores.post(scores.SHOT_FIRED)
             
-        # Print debug info
-        print(f"Player shot at position {shot_pos} with rotation {self.rotation}")
+        log.debug("Player shot at position %s with rotation %s", shot_pos, self.rotation)
         return shot
         
-    def collide(self, other):
+    def time_of_impact(self, other):
         # Don't collide when invulnerable
         if self.invulnerable > 0:
-            return False
-            
-        # Simple circle collision detection
-        distance = (self.position - other.position).length()
-        return distance < (self.radius + other.radius)
+            return None
+        return super().time_of_impact(other)
         
     def lose_life(self):
         """Player loses a life and becomes invulnerable for a short time"""
         self.lives -= 1
         self.invulnerable = 3.0  # 3 seconds of invulnerability
         
-        # Play death sound
-        if self.death_sound:
-            self.death_sound.play()
+        audio.post(audio.DEATH)
+        scores.post(scores.LIFE_LOST)
             
-        # Print debug info
-        print(f"Player lost a life! Lives remaining: {self.lives}")
+        log.info("Player lost a life! Lives remaining: %s", self.lives)
         return self.lives <= 0  # Return True if game over
\ No newline at end of file
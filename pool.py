@@ -0,0 +1,46 @@
+from constants import *
+
+
+class Pool:
+    """Keeps killed sprites of one class and hands them out again instead of allocating"""
+    def __init__(self, cls, limit=POOL_LIMIT):
+        self.cls = cls
+        self.limit = limit  # most free objects kept around
+        self.free = []
+        self.hits = 0        # acquires served from the free list
+        self.misses = 0      # acquires that had to build a new object
+        self.live = 0        # objects handed out and not yet released
+        self.high_water = 0  # most objects live at the same time
+        self.release_hooks = []  # called with every released object, see net.Server.forget
+
+    def acquire(self, *args):
+        """Return an object in the same state as cls(*args), added to the active registry"""
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            self.hits += 1
+        else:
+            obj = self.cls(*args)
+            self.misses += 1
+        obj.in_pool_use = True
+        self.live += 1
+        if self.live > self.high_water:
+            self.high_water = self.live
+        return obj
+
+    def release(self, obj):
+        # Called from CircleShape.kill, after the object left its table
+        self.live -= 1
+        for hook in self.release_hooks:
+            hook(obj)
+        if len(self.free) < self.limit:
+            self.free.append(obj)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "live": self.live,
+            "free": len(self.free),
+            "high_water": self.high_water,
+        }
@@ -0,0 +1,101 @@
+import collections
+import csv
+import json
+import time
+import pygame
+from constants import *
+
+PHASES = ("events", "update", "player_collisions", "shot_collisions", "draw", "hud", "flip", "wait")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    """Times each phase of a frame with perf_counter_ns
+
+    Call begin_frame(), then lap(phase) at the end of each phase (a phase
+    can be lapped several times per frame, e.g. once per simulation step,
+    and the times add up), then end_frame().
+    """
+    def __init__(self, window=PROFILE_WINDOW, history=PROFILE_HISTORY):
+        self.window = {phase: collections.deque(maxlen=window) for phase in PHASES}
+        self.window["frame"] = collections.deque(maxlen=window)
+        self.history = collections.deque(maxlen=history)  # one tuple of ns per frame, for dump()
+        self.current = dict.fromkeys(PHASES, 0)
+        self.mark = 0
+        self.frame_start = 0
+        self.overlay = PROFILE_OVERLAY
+        self.overlay_lines = []
+        self.overlay_frame = 0
+        self.font = None
+        self.gauges = {}  # name -> current value, shown under the table (e.g. the quality level)
+
+    def begin_frame(self):
+        for phase in PHASES:
+            self.current[phase] = 0
+        self.mark = self.frame_start = time.perf_counter_ns()
+
+    def lap(self, phase):
+        now = time.perf_counter_ns()
+        self.current[phase] += now - self.mark
+        self.mark = now
+
+    def end_frame(self):
+        total = self.mark - self.frame_start
+        timings = tuple(self.current[phase] for phase in PHASES)
+        for phase, value in zip(PHASES, timings):
+            self.window[phase].append(value)
+        self.window["frame"].append(total)
+        self.history.append(timings + (total,))
+
+    def percentiles(self):
+        """{phase: (p50, p95, p99)} in milliseconds over the rolling window"""
+        result = {}
+        for phase, values in self.window.items():
+            ordered = sorted(values)
+            result[phase] = tuple(percentile(ordered, p) / 1e6 for p in (0.5, 0.95, 0.99))
+        return result
+
+    def draw_overlay(self, screen):
+        """Draw the percentile table in the top right corner, returns the rects drawn"""
+        if not self.overlay:
+            return []
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        # Re-render the text twice a second, sorting the windows every frame is wasteful
+        self.overlay_frame += 1
+        if self.overlay_frame % 30 == 1:
+            lines = ["phase            p50    p95    p99 ms"]
+            for phase, (p50, p95, p99) in self.percentiles().items():
+                lines.append(f"{phase:<16}{p50:6.2f} {p95:6.2f} {p99:6.2f}")
+            for name, value in self.gauges.items():
+                lines.append(f"{name:<16}{value!s:>6}")
+            self.overlay_lines = [self.font.render(line, True, (0, 255, 0), (0, 0, 0)) for line in lines]
+        rects = []
+        y = 10
+        for text in self.overlay_lines:
+            rects.append(screen.blit(text, (screen.get_width() - text.get_width() - 10, y)))
+            y += text.get_height()
+        return rects
+
+    def dump(self, path):
+        """Write every recorded frame's timings (ns) to a .csv or .json file"""
+        columns = PHASES + ("frame",)
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows(self.history)
+        else:
+            with open(path, "w") as f:
+                json.dump({
+                    "unit": "ns",
+                    "columns": columns,
+                    "frames": list(self.history),
+                    "percentiles_ms": self.percentiles(),
+                }, f)
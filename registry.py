@@ -0,0 +1,125 @@
+"""Entity storage for a World.
+
+Every entity lives in exactly one Table, the one for its class (its
+archetype), as a row of a packed list. Adding appends a row and removing
+moves the last row into the hole (swap-remove), both O(1). Entities are
+__slots__ objects that know their own table and row, so there is no
+per-entity dict and no group membership to keep up to date.
+
+Queries pick tables by class and are live views:
+
+    asteroids = registry.query(Asteroid)    # Asteroid and its subclasses
+    for asteroid in asteroids:
+        ...
+
+Iterating a query walks a copy of the matching rows, so entities can be
+killed or created while it runs. Removal reorders a table, nothing should
+depend on the order within one.
+"""
+
+
+class Entity:
+    """Base of everything a Registry holds"""
+    __slots__ = ("table", "row")
+    registry = None  # where new entities are added, set by World.activate()
+    timers = None    # the active world's TimerWheel, set by World.activate()
+
+    def __init__(self):
+        self.table = None  # Table holding this entity, None once killed
+        self.row = -1
+        if self.registry is not None:
+            self.registry.add(self)
+
+    def alive(self):
+        return self.table is not None
+
+    def kill(self):
+        if self.table is not None:
+            self.table.remove(self)
+
+
+class Table:
+    """The live entities of one class, packed in a list"""
+    __slots__ = ("cls", "rows")
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.rows = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, entity):
+        entity.table = self
+        entity.row = len(self.rows)
+        self.rows.append(entity)
+
+    def remove(self, entity):
+        # Move the last row into the freed one so the list stays packed
+        last = self.rows.pop()
+        if last is not entity:
+            self.rows[entity.row] = last
+            last.row = entity.row
+        entity.table = None
+
+    def clear(self):
+        for entity in self.rows:
+            entity.table = None
+        self.rows.clear()
+
+
+class Query:
+    """Every entity whose class is one of `kinds` or a subclass, tables in the order of `kinds`"""
+    def __init__(self, registry, kinds):
+        self.registry = registry
+        self.kinds = kinds
+        self.tables = []
+        self.version = -1  # registry version the tables were matched at
+
+    def matching(self):
+        registry = self.registry
+        if self.version != registry.version:
+            self.tables = []
+            for kind in self.kinds:
+                for table in registry.tables.values():
+                    if issubclass(table.cls, kind) and table not in self.tables:
+                        self.tables.append(table)
+            self.version = registry.version
+        return self.tables
+
+    def __iter__(self):
+        tables = self.matching()
+        if len(tables) == 1:
+            return iter(tables[0].rows.copy())
+        return iter([entity for table in tables for entity in table.rows])
+
+    def __len__(self):
+        return sum(len(table.rows) for table in self.matching())
+
+
+class Registry:
+    """All entities of one world, one Table per class"""
+    def __init__(self):
+        self.tables = {}  # class -> Table, in the order the classes first showed up
+        self.version = 0  # bumped when a table is added, so queries match again
+
+    def __len__(self):
+        return sum(len(table.rows) for table in self.tables.values())
+
+    def add(self, entity):
+        cls = type(entity)
+        table = self.tables.get(cls)
+        if table is None:
+            table = self.tables[cls] = Table(cls)
+            self.version += 1
+        table.add(entity)
+
+    def query(self, *kinds):
+        return Query(self, kinds)
+
+    def clear(self):
+        for table in self.tables.values():
+            table.clear()
+
+    def stats(self):
+        return {cls.__name__: len(table.rows) for cls, table in self.tables.items()}
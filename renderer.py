@@ -0,0 +1,43 @@
+import pygame
+from constants import *
+
+
+class DirtyRenderer:
+    """Erases and updates only the parts of the screen that changed since last frame"""
+    def __init__(self, screen, threshold=DIRTY_RECT_THRESHOLD, background=(0, 0, 0)):
+        self.screen = screen
+        self.background = background
+        # Past this many pixels, one full flip is cheaper than many small updates
+        self.max_dirty_area = threshold * screen.get_width() * screen.get_height()
+        self.previous = []  # rects drawn last frame
+        self.full_frames = 0
+        self.partial_frames = 0
+
+    def reset(self):
+        """Clear the whole screen, e.g. after another screen was shown"""
+        self.screen.fill(self.background)
+        pygame.display.flip()
+        self.previous = []
+
+    def begin(self):
+        """Erase what was drawn last frame"""
+        fill = self.screen.fill
+        for rect in self.previous:
+            fill(self.background, rect)
+
+    def present(self, drawn):
+        """Show this frame, given the rects drawn since begin()"""
+        dirty = self.previous + drawn
+        area = 0
+        for rect in dirty:
+            area += rect.width * rect.height
+        if area > self.max_dirty_area:
+            pygame.display.flip()
+            self.full_frames += 1
+        else:
+            pygame.display.update(dirty)
+            self.partial_frames += 1
+        self.previous = drawn
+
+    def stats(self):
+        return {"partial_frames": self.partial_frames, "full_frames": self.full_frames}
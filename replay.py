@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Record a session's inputs and play it back frame for frame.
+
+A replay holds the seed of the world's random streams (see rng.py) plus,
+for every simulation step, the held keys (as a bitmask) and dt.
+Since the simulation only depends on those, playing them back reproduces
+the session exactly. Every REPLAY_CHECKSUM_INTERVAL steps a CRC of the
+world state is stored too, so a replay that drifts (because the game code
+changed, for example) is caught at the first checkpoint after it happens.
+
+File layout: MAGIC, a fixed header (seed, step count, checksum interval)
+and a zlib-compressed stream of records. Only changes are written: each
+record is the number of steps since the last record (varint), a flags
+byte and then the new key mask, the new dt and/or a checksum.
+
+    python replay.py play replays/game.lzr              # headless, max speed
+    python replay.py play replays/game.lzr --realtime   # in a window
+    python replay.py record replays/test.lzr --frames 5000 --seed 7
+"""
+import os
+import random
+import struct
+import time
+import zlib
+import pygame
+from constants import *
+import log
+
+MAGIC = b"LAZREP3\x00"  # 3: spawns and cooldowns on the timer wheel (2: counter-based random streams)
+HEADER = struct.Struct("<QII")  # seed, steps, checksum interval
+DT = struct.Struct("<d")
+CHECKSUM = struct.Struct("<I")
+
+MASK_CHANGED = 1
+DT_CHANGED = 2
+HAS_CHECKSUM = 4
+
+# Bit order of the key mask
+KEYS = (pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s, pygame.K_SPACE)
+
+
+def key_mask(keys):
+    mask = 0
+    for bit, key in enumerate(KEYS):
+        if keys[key]:
+            mask |= 1 << bit
+    return mask
+
+
+class MaskKeys:
+    """Key state for a mask, in the same shape as pygame.key.get_pressed()"""
+    def __init__(self, mask):
+        self.held = {key for bit, key in enumerate(KEYS) if mask & (1 << bit)}
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+def state_checksum(player, asteroids, shots):
+    """CRC32 of everything the simulation carries from one step to the next"""
+    values = [player.position.x, player.position.y, player.rotation, player.lives,
+              player.shot_cooldown, player.invulnerable]
+    for group in (asteroids, shots):
+        for sprite in group:
+            position = sprite.position
+            values += (position.x, position.y, sprite.radius)
+    return zlib.crc32(struct.pack(f"<{len(values)}d", *values))
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class Recorder:
+    """Collects the inputs of one session and writes them as a replay file"""
+    def __init__(self, seed=None, checksum_interval=REPLAY_CHECKSUM_INTERVAL):
+        self.seed = seed if seed is not None else int.from_bytes(os.urandom(8), "little")
+        self.checksum_interval = checksum_interval
+        self.body = bytearray()
+        self.steps = 0
+        self.last_record = 0
+        self.last_mask = 0
+        self.last_dt = None
+        self.mask = 0
+        self.source = None
+
+    def begin(self, player):
+        """Start listening to the player's controls, the world is reset with self.seed"""
+        self.source = player.controls
+        player.controls = self.controls
+
+    def controls(self):
+        keys = self.source()
+        self.mask = key_mask(keys)
+        return keys
+
+    def end_step(self, dt, player, asteroids, shots):
+        """Record the step that was just simulated"""
+        self.steps += 1
+        flags = 0
+        payload = bytearray()
+        if self.mask != self.last_mask:
+            flags |= MASK_CHANGED
+            payload.append(self.mask)
+            self.last_mask = self.mask
+        if dt != self.last_dt:
+            flags |= DT_CHANGED
+            payload += DT.pack(dt)
+            self.last_dt = dt
+        if self.steps % self.checksum_interval == 0:
+            flags |= HAS_CHECKSUM
+            payload += CHECKSUM.pack(state_checksum(player, asteroids, shots))
+        if flags:
+            write_varint(self.body, self.steps - self.last_record)
+            self.body.append(flags)
+            self.body += payload
+            self.last_record = self.steps
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(HEADER.pack(self.seed, self.steps, self.checksum_interval))
+            f.write(zlib.compress(bytes(self.body), 9))
+        log.info("Replay of %s steps saved to %s", self.steps, path)
+
+
+class Replay:
+    """A decoded replay file: the seed plus per-step masks, dts and checkpoints"""
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            if data.startswith(MAGIC[:6]):
+                raise ValueError(f"{path} was recorded by another version of the game")
+            raise ValueError(f"{path} is not a replay file")
+        self.seed, self.steps, self.checksum_interval = HEADER.unpack_from(data, len(MAGIC))
+        body = zlib.decompress(data[len(MAGIC) + HEADER.size:])
+
+        self.masks = bytearray(self.steps)
+        self.dts = [0.0] * self.steps
+        self.checksums = {}  # step number (1-based) -> crc
+        step = 0
+        mask = 0
+        dt = 0.0
+        offset = 0
+        while offset < len(body):
+            gap, offset = read_varint(body, offset)
+            flags = body[offset]
+            offset += 1
+            # Steps between records repeat the previous mask and dt
+            for index in range(step, step + gap - 1):
+                self.masks[index] = mask
+                self.dts[index] = dt
+            step += gap
+            if flags & MASK_CHANGED:
+                mask = body[offset]
+                offset += 1
+            if flags & DT_CHANGED:
+                (dt,) = DT.unpack_from(body, offset)
+                offset += DT.size
+            if flags & HAS_CHECKSUM:
+                (self.checksums[step],) = CHECKSUM.unpack_from(body, offset)
+                offset += CHECKSUM.size
+            self.masks[step - 1] = mask
+            self.dts[step - 1] = dt
+        for index in range(step, self.steps):
+            self.masks[index] = mask
+            self.dts[index] = dt
+
+
+class ReplayControls:
+    """Feeds the recorded key masks to the player, one per step"""
+    def __init__(self, replay):
+        self.keys = [MaskKeys(mask) for mask in range(1 << len(KEYS))]
+        self.masks = replay.masks
+        self.step = 0
+
+    def __call__(self):
+        return self.keys[self.masks[self.step]]
+
+
+def play(path, realtime=False):
+    """Re-run a replay and return a summary, including the first diverging step if any"""
+    from player import Player
+    from asteroidfield import AsteroidField
+    from world import World
+
+    replay = Replay(path)
+    world = World()
+    world.activate()
+    player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+    controls = player.controls = ReplayControls(replay)
+    world.reset(player, AsteroidField(), replay.seed)
+
+    screen = clock = sprite_cache = None
+    if realtime:
+        from spritecache import SpriteCache
+        pygame.display.init()
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        clock = pygame.time.Clock()
+        sprite_cache = SpriteCache()
+
+    divergence = None
+    game_over = False
+    start = time.perf_counter()
+    for step in range(replay.steps):
+        controls.step = step
+        dt = replay.dts[step]
+        game_over = world.update(player, dt)
+        expected = replay.checksums.get(step + 1)
+        if expected is not None and divergence is None:
+            if state_checksum(player, world.asteroids, world.shots) != expected:
+                divergence = step + 1
+                log.warning("Replay diverged at step %s", divergence)
+        if realtime:
+            if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                break
+            screen.fill((0, 0, 0))
+            sprite_cache.draw(screen, world.drawable)
+            pygame.display.flip()
+            clock.tick(1 / dt if dt else 0)
+        if game_over:
+            break
+    elapsed = time.perf_counter() - start
+
+    return {
+        "steps": step + 1 if replay.steps else 0,
+        "recorded_steps": replay.steps,
+        "game_over": game_over,
+        "lives": player.lives,
+        "checkpoints": len(replay.checksums),
+        "diverged_at": divergence,
+        "elapsed": elapsed,
+        "steps_per_second": (step + 1) / elapsed if replay.steps and elapsed > 0 else float("inf"),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Record and play back game sessions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    play_parser = commands.add_parser("play", help="play a replay file")
+    play_parser.add_argument("path")
+    play_parser.add_argument("--realtime", action="store_true", help="show it in a window at recorded speed")
+    record_parser = commands.add_parser("record", help="record a headless session with a random pilot")
+    record_parser.add_argument("path")
+    record_parser.add_argument("--frames", type=int, default=3600)
+    record_parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "play":
+        if not args.realtime:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        result = play(args.path, args.realtime)
+    else:
+        import headless
+        recorder = Recorder(args.seed)
+        result = headless.run_headless(args.frames, controls=headless.RandomControls(rng=random.Random(args.seed)),
+                                       recorder=recorder)
+        recorder.save(args.path)
+    for key, value in result.items():
+        print(f"{key}: {value}")
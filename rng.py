@@ -0,0 +1,92 @@
+"""Counter-based random streams.
+
+A Stream has no hidden state that advances with every draw. Its values
+are a hash (SplitMix64) of the stream's key, the simulation step and a
+counter of the draws made in that step:
+
+    value(seed, name, step, n) = mix(key(seed, name) + (step << 32 | n) * GAMMA)
+
+so what a subsystem draws never depends on what anything else in the
+process drew, any step's values can be computed again on their own (see
+values()), and many values can be made at once. Each World owns one
+stream per subsystem ("spawner", "splitter"), seeded from the game seed.
+"""
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, batches are then made one value at a time
+    np = None
+
+MASK = (1 << 64) - 1
+GAMMA = 0x9E3779B97F4A7C15
+NUMPY_BATCH = 32  # smaller batches are quicker without NumPy
+
+
+def mix(x):
+    """SplitMix64 finalizer, a 64-bit integer to a well scrambled 64-bit integer"""
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+
+def mix_array(x):
+    """mix() over a uint64 array, the multiplications wrap like the masked ones above"""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class Stream:
+    """Seedable random numbers for one subsystem, addressed by (step, draw number)"""
+    def __init__(self, name, seed=0):
+        self.name = name
+        self.key = 0
+        self.step = 0
+        self.counter = 0  # draws made in this step
+        self.seed(seed)
+
+    def seed(self, seed):
+        self.key = mix((seed & MASK) ^ zlib.crc32(self.name.encode()))
+        self.step = 0
+        self.counter = 0
+
+    def begin_step(self, step):
+        """Draw the values of `step` from now on, starting with its first"""
+        self.step = step
+        self.counter = 0
+
+    def random(self):
+        """Float in [0, 1)"""
+        index = self.step << 32 | self.counter
+        self.counter += 1
+        return (mix((self.key + index * GAMMA) & MASK) >> 11) * 2.0 ** -53
+
+    def uniform(self, a, b):
+        return a + (b - a) * self.random()
+
+    def randint(self, a, b):
+        """Integer in [a, b], both included"""
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+    def batch(self, count):
+        """The next `count` values of this step as a list, as if random() was called `count` times"""
+        values = self.values(self.step, count, self.counter)
+        self.counter += count
+        return values
+
+    def values(self, step, count, start=0):
+        """Values `start` to `start + count` of `step`, without moving the stream
+
+        This is how a step's random decisions are regenerated, e.g. the
+        spawner's at step 5000 are Stream("spawner", seed).values(5000, 5).
+        """
+        first = step << 32 | start
+        if np is None or count < NUMPY_BATCH:
+            return [(mix((self.key + (first + n) * GAMMA) & MASK) >> 11) * 2.0 ** -53 for n in range(count)]
+        indices = np.arange(first, first + count, dtype=np.uint64)
+        x = np.uint64(self.key) + indices * np.uint64(GAMMA)
+        return ((mix_array(x) >> np.uint64(11)) * 2.0 ** -53).tolist()
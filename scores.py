@@ -0,0 +1,238 @@
+"""High scores and per-game statistics in a local SQLite database.
+
+Gameplay code posts events, e.g. scores.post(scores.SHOT_FIRED), to the
+installed store. NullStore records nothing (headless runs, the server).
+ScoreStore buffers the events in memory and a writer thread adds them up
+per game and stores them in one transaction every SCORE_FLUSH_INTERVAL
+seconds and when a game ends.
+
+`sessions` has a row per game (seed, duration, score, shots fired, lives
+lost) and `splits` a row per game and asteroid size with how many were
+broken. top() reads the finished games back for the leaderboard.
+"""
+import collections
+import sqlite3
+import threading
+import time
+from constants import *
+import log
+
+SHOT_FIRED = "shot_fired"
+LIFE_LOST = "life_lost"
+ASTEROID_SPLIT = "asteroid_split"
+# Posted by the store itself
+BEGIN = "begin"
+END = "end"
+QUERY = "query"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,                  -- Unix time
+    seed TEXT,                              -- the world's seed in hex
+    duration REAL NOT NULL DEFAULT 0,       -- simulated seconds
+    score INTEGER NOT NULL DEFAULT 0,       -- asteroids destroyed
+    shots_fired INTEGER NOT NULL DEFAULT 0,
+    lives_lost INTEGER NOT NULL DEFAULT 0,
+    finished INTEGER NOT NULL DEFAULT 0     -- 1 if it ended in a game over, 0 if the window was closed
+);
+CREATE TABLE IF NOT EXISTS splits (
+    session INTEGER NOT NULL REFERENCES sessions(id),
+    kind INTEGER NOT NULL,                  -- asteroid size, 1 to ASTEROID_KINDS
+    count INTEGER NOT NULL,
+    PRIMARY KEY (session, kind)
+);
+CREATE INDEX IF NOT EXISTS leaderboard ON sessions(score DESC, started) WHERE finished = 1;
+"""
+
+# Walks the leaderboard index and stops after `count` rows
+TOP_QUERY = "SELECT score, duration, started FROM sessions WHERE finished = 1 ORDER BY score DESC, started LIMIT ?"
+
+
+class NullStore:
+    """Records nothing"""
+    def start(self):
+        pass
+
+    def post(self, event, value=0):
+        pass
+
+    def begin_session(self, seed=None):
+        pass
+
+    def end_session(self, duration, score, finished=True):
+        pass
+
+    def top(self, count=LEADERBOARD_SIZE):
+        return []
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class ScoreStore:
+    """Buffers events and writes them to the database at `path` on a background thread
+
+    If the database can't be opened the store logs a warning and drops
+    everything from then on, the game goes on without it.
+    """
+    def __init__(self, path=SCORE_DB, interval=SCORE_FLUSH_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.buffer = collections.deque()  # (event, session, value), appended by the game's threads
+        self.wakeup = threading.Event()
+        self.session = 0        # number of the current game in this process, 0 before the first
+        self.rows = {}          # session number -> its sessions row id, only used by the writer
+        self.thread = None
+        self.closing = False
+        self.failed = False     # the database couldn't be opened
+        self.written = 0        # events written, not counting those posted outside of a game
+        self.batches = 0        # transactions
+        self.write_time = 0.0   # seconds the writer spent in them
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="score-writer", daemon=True)
+        self.thread.start()
+
+    def post(self, event, value=0):
+        if not self.failed:
+            self.buffer.append((event, self.session, value))
+
+    def begin_session(self, seed=None):
+        """Start counting a new game, events posted from now on belong to it"""
+        self.session += 1
+        self.post(BEGIN, (time.time(), seed))
+
+    def end_session(self, duration, score, finished=True):
+        """Record how the current game ended, `finished` games go on the leaderboard"""
+        self.post(END, (duration, score, finished))
+        self.wakeup.set()
+
+    def top(self, count=LEADERBOARD_SIZE, timeout=1.0):
+        """The `count` best finished games as (score, duration, started), best first
+
+        The writer thread answers after writing everything posted before,
+        so a game that just ended is included. Returns [] if the answer
+        takes longer than `timeout` seconds.
+        """
+        if self.failed or not self.thread:
+            return []
+        done = threading.Event()
+        reply = []
+        self.buffer.append((QUERY, count, (done, reply)))
+        self.wakeup.set()
+        done.wait(timeout)
+        return list(reply)
+
+    def close(self):
+        """Write out what is buffered and stop the writer thread"""
+        if self.thread:
+            self.closing = True
+            self.wakeup.set()
+            self.thread.join()
+
+    def run(self):
+        try:
+            connection = self.connect()
+        except sqlite3.Error as e:
+            self.failed = True
+            self.buffer.clear()
+            log.warning("Score database %s could not be opened: %s", self.path, e)
+            return
+        try:
+            while True:
+                self.wakeup.wait(self.interval)
+                self.wakeup.clear()
+                closing = self.closing  # read first, so nothing posted before close() is missed
+                self.write(connection)
+                if closing:
+                    return
+        finally:
+            connection.close()
+
+    def connect(self):
+        # The writer thread's own connection, transactions are begun explicitly
+        connection = sqlite3.connect(self.path, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")  # in WAL mode a crash can lose the last commits, not corrupt
+        connection.executescript(SCHEMA)
+        return connection
+
+    def write(self, connection):
+        """One transaction for everything buffered, then answer the top() queries among it"""
+        events = []
+        while self.buffer:
+            events.append(self.buffer.popleft())
+        if not events:
+            return
+        start = time.perf_counter()
+        shots = collections.Counter()   # session -> shots fired
+        lives = collections.Counter()   # session -> lives lost
+        splits = collections.Counter()  # (session, kind) -> asteroids broken
+        ends = []
+        queries = []
+        skipped = 0
+        rows = self.rows
+        try:
+            connection.execute("BEGIN")
+            for event, session, value in events:
+                if event == QUERY:
+                    queries.append((session, value))  # (count, (done, reply))
+                elif event == BEGIN:
+                    started, seed = value
+                    cursor = connection.execute("INSERT INTO sessions (started, seed) VALUES (?, ?)",
+                                                (started, None if seed is None else format(seed, "x")))
+                    rows[session] = cursor.lastrowid
+                elif session not in rows:
+                    skipped += 1  # posted outside of a game
+                elif event == SHOT_FIRED:
+                    shots[rows[session]] += 1
+                elif event == LIFE_LOST:
+                    lives[rows[session]] += 1
+                elif event == ASTEROID_SPLIT:
+                    splits[rows[session], value] += 1
+                elif event == END:
+                    duration, score, finished = value
+                    ends.append((duration, score, int(finished), rows.pop(session)))
+            connection.executemany(
+                "UPDATE sessions SET shots_fired = shots_fired + ?, lives_lost = lives_lost + ? WHERE id = ?",
+                [(shots[row], lives[row], row) for row in shots.keys() | lives.keys()])
+            connection.executemany(
+                "INSERT INTO splits VALUES (?, ?, ?) ON CONFLICT (session, kind) DO UPDATE SET count = count + excluded.count",
+                [(row, kind, count) for (row, kind), count in splits.items()])
+            connection.executemany("UPDATE sessions SET duration = ?, score = ?, finished = ? WHERE id = ?", ends)
+            connection.execute("COMMIT")
+            self.written += len(events) - len(queries) - skipped
+            self.batches += 1
+        except sqlite3.Error as e:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            rows.clear()  # row ids inserted by this batch are gone, later events of open games are dropped
+            log.warning("Could not write %s score events: %s", len(events), e)
+        self.write_time += time.perf_counter() - start
+
+        for count, (done, reply) in queries:
+            try:
+                reply.extend(connection.execute(TOP_QUERY, (count,)).fetchall())
+            except sqlite3.Error as e:
+                log.warning("Could not read the leaderboard: %s", e)
+            done.set()
+
+    def stats(self):
+        return {"written": self.written, "batches": self.batches, "write_ms": self.write_time * 1000,
+                "buffered": len(self.buffer)}
+
+
+backend = NullStore()  # main.py installs a ScoreStore, everything else records nothing
+
+
+def install(new_backend):
+    global backend
+    backend = new_backend
+
+
+def post(event, value=0):
+    backend.post(event, value)
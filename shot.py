@@ -1,16 +1,34 @@
 import pygame
 from constants import *
 from circleshape import CircleShape
+from views import CircleView
 
 class Shot(CircleShape):
+    __slots__ = ("rotation",)
+
     def __init__(self, x, y, rotation):
         super().__init__(x, y, SHOT_RADIUS)
         self.rotation = rotation
         # Use the same forward vector convention as the Player class
         self.velocity = pygame.Vector2(0, 1).rotate(self.rotation) * PLAYER_SHOT_SPEED
 
-    def draw(self, screen):
-        pygame.draw.circle(screen, "yellow", (int(self.position.x), int(self.position.y)), self.radius)
+    def reset(self, x, y, rotation):
+        super().reset(x, y, SHOT_RADIUS)
+        self.rotation = rotation
+        self.velocity = pygame.Vector2(0, 1).rotate(self.rotation) * PLAYER_SHOT_SPEED
+
+    def draw(self, screen, alpha=1.0):
+        position = self.render_position(alpha)
+        pygame.draw.circle(screen, "yellow", (int(position.x), int(position.y)), self.radius)
+
+    def blit_item(self, cache, alpha=1.0):
+        surface, offset = cache.circle("yellow", self.radius)
+        position = self.render_position(alpha) * cache.scale
+        return surface, (int(position.x) - offset, int(position.y) - offset)
+
+    def view(self, alpha=1.0):
+        position = self.render_position(alpha)
+        return CircleView(position.x, position.y, self.radius, "yellow", 0)
 
     def update(self, dt):
         self.position += self.velocity * dt
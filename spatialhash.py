@@ -0,0 +1,92 @@
+import math
+from constants import *
+
+
+# Uniform grid used as a collision broadphase
+class SpatialHash:
+    def __init__(self, cell_size=SPATIAL_HASH_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (cell_x, cell_y) -> list of objects
+        self.order = {}  # object -> (insertion number, cell key)
+        self.max_radius = 0
+        self.counter = 0
+
+    def cell_of(self, position):
+        return (math.floor(position.x / self.cell_size),
+                math.floor(position.y / self.cell_size))
+
+    def clear(self):
+        self.cells.clear()
+        self.order.clear()
+        self.max_radius = 0
+        self.counter = 0
+
+    def rebuild(self, objects):
+        """Clear the grid and insert every object again (call once per frame)"""
+        self.clear()
+        for obj in objects:
+            self.insert(obj)
+
+    def rebuild_cells(self, objects, keys, max_radius):
+        """rebuild() with each object's cell and the largest radius already worked out"""
+        self.clear()
+        cells = self.cells
+        order = self.order
+        for counter, (obj, key) in enumerate(zip(objects, keys)):
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [obj]
+            else:
+                cell.append(obj)
+            order[obj] = (counter, key)
+        self.counter = len(order)
+        self.max_radius = max_radius
+
+    def insert(self, obj):
+        key = self.cell_of(obj.position)
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [obj]
+        else:
+            cell.append(obj)
+        self.order[obj] = (self.counter, key)
+        self.counter += 1
+        if obj.radius > self.max_radius:
+            self.max_radius = obj.radius
+
+    def remove(self, obj):
+        entry = self.order.pop(obj, None)
+        if entry is None:
+            return
+        cell = self.cells[entry[1]]
+        cell.remove(obj)
+        if not cell:
+            del self.cells[entry[1]]
+
+    def query(self, position, radius):
+        """Return the objects that may overlap a circle, in insertion order"""
+        # Objects are bucketed by their centre, so widen the search by the
+        # largest radius stored in the grid
+        reach = radius + self.max_radius
+        size = self.cell_size
+        min_x = math.floor((position.x - reach) / size)
+        max_x = math.floor((position.x + reach) / size)
+        min_y = math.floor((position.y - reach) / size)
+        max_y = math.floor((position.y + reach) / size)
+
+        found = []
+        cells = self.cells
+        for cx in range(min_x, max_x + 1):
+            for cy in range(min_y, max_y + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    found.extend(cell)
+
+        # Keep the same order the sprite group would have used
+        if len(found) > 1:
+            order = self.order
+            found.sort(key=lambda obj: order[obj][0])
+        return found
+
+    def __len__(self):
+        return len(self.order)
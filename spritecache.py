@@ -0,0 +1,71 @@
+import pygame
+from constants import *
+from player import ship_triangle
+
+
+def asteroid_radii():
+    """Every radius an asteroid can have: the spawned kinds and their split fragments"""
+    radii = set()
+    for kind in range(1, ASTEROID_KINDS + 1):
+        radius = ASTEROID_MIN_RADIUS * kind
+        radii.add(radius)
+        # Same rule as Asteroid.split
+        while radius > ASTEROID_MIN_RADIUS:
+            radius //= 2
+            radii.add(radius)
+    return sorted(radii)
+
+
+class SpriteCache:
+    """Pre-rendered surfaces for asteroids, shots and the rotated ship
+
+    Needs a display mode to be set first, surfaces are converted to the
+    screen format so blitting them is a plain copy.
+    """
+    def __init__(self, angle_steps=SHIP_ANGLE_STEPS, scale=1):
+        self.scale = scale  # size of the target surface relative to the screen
+        self.circles = {}   # (color, radius, width) -> (surface, offset)
+        for radius in asteroid_radii():
+            self.circle("brown", radius)
+        self.circle("yellow", SHOT_RADIUS)
+
+        # One outline per quantized angle, rotation 0 points down like the player
+        self.angle_steps = angle_steps
+        self.ships = [self.render_ship(step * 360 / angle_steps) for step in range(angle_steps)]
+
+    def circle(self, color, radius, width=0):
+        """Circle of a game radius (drawn at the cache's scale), width 0 fills it"""
+        key = (color, radius, width)
+        entry = self.circles.get(key)
+        if entry is None:
+            # Odd radii (e.g. from an unusual split) and outlines are rendered on first use
+            radius = max(1, round(radius * self.scale))
+            surface = pygame.Surface((radius * 2, radius * 2))
+            pygame.draw.circle(surface, color, (radius, radius), radius, width)
+            surface = surface.convert()
+            surface.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+            entry = self.circles[key] = (surface, radius)
+        return entry
+
+    def render_ship(self, rotation):
+        line = max(1, round(2 * self.scale))
+        offset = round(PLAYER_RADIUS * self.scale) + line  # room for the outline
+        surface = pygame.Surface((offset * 2, offset * 2))
+        points = ship_triangle(pygame.Vector2(offset, offset), rotation, PLAYER_RADIUS * self.scale)
+        pygame.draw.polygon(surface, "white", points, line)
+        surface = surface.convert()
+        surface.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        return surface, offset
+
+    def ship(self, rotation):
+        step = round(rotation * self.angle_steps / 360) % self.angle_steps
+        return self.ships[step]
+
+    def draw(self, screen, sprites, alpha=1.0):
+        """Draw every sprite with a single Surface.blits call, returns the rects drawn"""
+        items = []
+        for sprite in sprites:
+            item = sprite.blit_item(self, alpha)
+            if item:
+                items.append(item)
+        return screen.blits(items)
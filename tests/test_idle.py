@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pygame
+from constants import *
+import main
+
+
+class IdleTest(unittest.TestCase):
+    def setUp(self):
+        pygame.init()
+        pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    def tearDown(self):
+        pygame.quit()
+
+    def wait(self, *args):
+        """wait_for_key(*args) and the share of a core it used"""
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        key = main.wait_for_key(*args)
+        return key, (time.process_time() - cpu) / (time.perf_counter() - wall)
+
+    def test_paused_screen_sleeps(self):
+        # The pause screen until P is pressed
+        pygame.time.set_timer(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_p), 1000, 1)
+        key, share = self.wait((pygame.K_p, ))
+        self.assertEqual(key, pygame.K_p)
+        self.assertLess(share, IDLE_CPU_LIMIT)
+
+    def test_attract_screen_sleeps(self):
+        # The game over screen running into its idle timeout
+        key, share = self.wait((pygame.K_r, pygame.K_q), 1)
+        self.assertEqual(key, main.TIMED_OUT)
+        self.assertLess(share, IDLE_CPU_LIMIT)
+
+
+if __name__ == "__main__":
+    unittest.main()
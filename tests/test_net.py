@@ -0,0 +1,30 @@
+import os
+import sys
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import net
+
+
+class InputTest(unittest.TestCase):
+    def setUp(self):
+        self.server = net.Server(port=0, seed=1)
+        self.address = ("127.0.0.1", 9)  # nothing listens there, snapshots are just dropped
+        self.server.join(self.address)
+        self.client = self.server.clients[self.address]
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_out_of_range_mask_keeps_the_server_ticking(self):
+        packet = net.INPUT_MESSAGE.pack(net.INPUT, net.NO_TICK, 1, 1) + bytes((200,))
+        self.server.receive_input(self.client, packet)
+        for _ in range(3):
+            self.server.tick()
+        self.assertEqual(self.server.tick_count, 3)
+        self.assertEqual(self.client.mask, 200 & net.KEY_MASK)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pygame
+import physics
+
+
+@unittest.skipIf(physics.np is None, "needs NumPy")
+class KillTest(unittest.TestCase):
+    def test_killed_body_keeps_its_own_state(self):
+        kernel = physics.PhysicsKernel()
+        first = physics.ArrayAsteroid(100, 200, 20)
+        first.velocity = pygame.Vector2(1, 2)
+        last = physics.ArrayAsteroid(500, 500, 40)
+        last.velocity = pygame.Vector2(3, 4)
+
+        first.kill()  # not the last row, so `last` is swapped into its slot
+
+        self.assertEqual(first.position, pygame.Vector2(100, 200))
+        self.assertEqual(first.velocity, pygame.Vector2(1, 2))
+        self.assertEqual(first.radius, 20)
+        self.assertEqual(last.position, pygame.Vector2(500, 500))
+        self.assertEqual(last.velocity, pygame.Vector2(3, 4))
+        self.assertEqual(last.radius, 40)
+        self.assertEqual(len(kernel.asteroids), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""Hierarchical timer wheel on simulation time.
+
+Entities schedule callbacks instead of counting down a timer every frame:
+
+    timer = self.timers.schedule(0.3, self.cooldown_over)
+
+The wheel counts ticks of TIMER_RESOLUTION seconds. Level 0 has one slot
+per tick for the next 2**TIMER_WHEEL_BITS ticks, each level above covers
+2**TIMER_WHEEL_BITS times the span of the one below, and a higher level's
+slot is moved down (cascaded) when the tick reaches it. Advancing a tick
+only looks at the timers due on it (plus the occasional cascade), however
+many entities there are. When a frame covers several ticks they are run
+one by one, so a repeating timer fires once for every interval that
+passed and its next occurrence is counted from when it was due.
+"""
+import math
+from constants import *
+
+
+class Timer:
+    """A scheduled callback, cancel() it to stop it from firing"""
+    __slots__ = ("wheel", "due", "callback", "cancelled")
+
+    def __init__(self, wheel, due, callback):
+        self.wheel = wheel
+        self.due = due  # tick to fire on
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self.wheel.pending -= 1
+
+    def remaining(self):
+        """Seconds of simulation time until it fires"""
+        return (self.due - self.wheel.tick) * self.wheel.resolution
+
+
+class TimerWheel:
+    def __init__(self, resolution=TIMER_RESOLUTION, bits=TIMER_WHEEL_BITS, levels=TIMER_WHEEL_LEVELS):
+        self.resolution = resolution
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.levels = [[[] for _ in range(1 << bits)] for _ in range(levels)]
+        self.unscheduled = []  # timers with an infinite delay, only here so clear() reaches them
+        self.tick = 0       # ticks advanced so far
+        self.pending = 0    # timers scheduled and not yet fired or cancelled
+        self.fired = 0
+        self.cascaded = 0   # timers moved down a level
+
+    def clear(self):
+        """Drop every timer and start again from tick 0"""
+        for slots in self.levels:
+            for slot in slots:
+                for timer in slot:
+                    timer.cancelled = True
+                slot.clear()
+        for timer in self.unscheduled:
+            timer.cancelled = True
+        self.unscheduled.clear()
+        self.tick = 0
+        self.pending = 0
+
+    def schedule(self, delay, callback):
+        """Call callback() `delay` seconds from now (at least one tick), returns its Timer"""
+        if math.isinf(delay):
+            timer = Timer(self, math.inf, callback)  # never fires, but can be cancelled
+            self.unscheduled.append(timer)
+        else:
+            timer = Timer(self, self.tick + max(1, round(delay / self.resolution)), callback)
+            self.insert(timer)
+        self.pending += 1
+        return timer
+
+    def insert(self, timer):
+        due = timer.due
+        tick = self.tick
+        bits = self.bits
+        # The lowest level whose current round the due tick falls in
+        for level, slots in enumerate(self.levels):
+            shift = bits * (level + 1)
+            if due >> shift == tick >> shift:
+                slots[(due >> (bits * level)) & self.mask].append(timer)
+                return
+        # Past the top level's round. Less than a rotation ahead its own top slot
+        # comes round first, further out it is parked in the slot cascaded last
+        # and put back when that one comes round again.
+        top = len(self.levels) - 1
+        shift = bits * top
+        if (due >> shift) - (tick >> shift) <= self.mask:
+            index = (due >> shift) & self.mask
+        else:
+            index = ((tick >> shift) - 1) & self.mask
+        self.levels[top][index].append(timer)
+
+    def advance(self, time):
+        """Fire every timer due up to `time` seconds of simulation time, in order"""
+        target = int(time / self.resolution + 1e-6)  # summed dts fall a hair short of whole ticks
+        if not self.pending:
+            self.tick = max(self.tick, target)  # every slot is empty, nothing to cascade
+            return
+        while self.tick < target:
+            self.tick += 1
+            self.run_tick()
+
+    def run_tick(self):
+        tick = self.tick
+        bits = self.bits
+        # Crossing into a new slot of one or more higher levels: move their
+        # timers down, highest level first
+        level = 0
+        while level + 1 < len(self.levels) and not tick & ((1 << (bits * (level + 1))) - 1):
+            level += 1
+        for level in range(level, 0, -1):
+            slots = self.levels[level]
+            index = (tick >> (bits * level)) & self.mask
+            timers = slots[index]
+            slots[index] = []
+            for timer in timers:
+                if not timer.cancelled:
+                    self.cascaded += 1
+                    self.insert(timer)
+
+        slots = self.levels[0]
+        index = tick & self.mask
+        timers = slots[index]
+        slots[index] = []  # callbacks may schedule new timers, never for this tick
+        for timer in timers:
+            if timer.cancelled:
+                continue
+            if timer.due != tick:
+                self.insert(timer)  # parked past the top level (with a single level it lands here)
+            else:
+                timer.cancelled = True
+                self.pending -= 1
+                self.fired += 1
+                timer.callback()
+
+    def stats(self):
+        return {"pending": self.pending, "fired": self.fired, "cascaded": self.cascaded}
@@ -0,0 +1,86 @@
+from constants import *
+
+
+class FixedTimestep:
+    """Accumulates real frame time and hands it out as fixed simulation steps"""
+    def __init__(self, tick_rate=SIM_TICK_RATE, max_steps=MAX_SIM_STEPS_PER_FRAME):
+        self.dt = 1.0 / tick_rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.steps = 0           # total steps handed out
+        self.skipped_steps = 0   # steps thrown away because a frame fell too far behind
+
+    def advance(self, frame_time):
+        """Add a frame's worth of time and return how many steps to simulate"""
+        self.accumulator += frame_time
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            # Don't try to catch up forever after a long stall (spiral of death)
+            self.skipped_steps += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+        self.steps += steps
+        return steps
+
+    @property
+    def alpha(self):
+        """How far the renderer is between the last two simulation states (0..1)"""
+        return self.accumulator / self.dt
+
+
+class FramePacer:
+    """Caps the render rate (or leaves it to vsync / nothing) and tracks late frames"""
+    def __init__(self, clock, fps_cap=FPS_CAP, vsync=VSYNC, refresh_rate=REFRESH_RATE):
+        self.clock = clock
+        self.fps_cap = fps_cap
+        self.vsync = vsync
+        if vsync:
+            self.target = 1.0 / refresh_rate  # flip() blocks until the next refresh (pygame can't tell the rate)
+        elif fps_cap:
+            self.target = 1.0 / fps_cap
+        else:
+            self.target = None                # uncapped, nothing can be late
+        self.frame_time = 0.0    # length of the last frame in seconds
+        self.frames = 0
+        self.late_frames = 0     # frames that took longer than the target interval
+        self.dropped_frames = 0  # whole target intervals with no new frame shown
+        self.worst_frame_time = 0.0
+
+    @property
+    def mode(self):
+        if self.vsync:
+            return "vsync"
+        return f"{self.fps_cap} fps" if self.fps_cap else "uncapped"
+
+    def start(self):
+        """Restart timing, so time spent before the loop isn't counted as a frame"""
+        self.clock.tick()
+        self.frame_time = 0.0
+
+    def tick(self):
+        """Wait for the next frame slot and return the real frame time in seconds"""
+        if self.fps_cap and not self.vsync:
+            self.clock.tick(self.fps_cap)
+        else:
+            self.clock.tick()  # only measure
+        frame_time = self.clock.get_time() / 1000.0
+
+        self.frame_time = frame_time
+        self.frames += 1
+        self.worst_frame_time = max(self.worst_frame_time, frame_time)
+        if self.target and frame_time > self.target * (1 + LATE_FRAME_TOLERANCE):
+            self.late_frames += 1
+            self.dropped_frames += max(0, round(frame_time / self.target) - 1)
+        return frame_time
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "frames": self.frames,
+            "late_frames": self.late_frames,
+            "dropped_frames": self.dropped_frames,
+            "worst_frame_ms": round(self.worst_frame_time * 1000, 1),
+            "fps": round(self.clock.get_fps(), 1),
+        }
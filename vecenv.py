@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""K independent games stepped in lockstep, with all state in NumPy arrays.
+
+For training control policies. `VecEnv` follows the Gym vector API:
+`reset()` returns the observations and `step(actions)` returns
+observations, rewards, terminated, truncated and an info dict, every one
+an array with one row per game. Finished games are reset automatically.
+
+An action is the held keys as a bitmask in replay.KEYS order: 1 = turn
+left (A), 2 = turn right (D), 4 = forward (W), 8 = back (S), 16 = shoot.
+
+The rules are the ones of Player, Asteroid, Shot and AsteroidField,
+collisions included: bodies are swept over the step (circleshape.sweep_time)
+and hits are taken earliest first, so each shot breaks the first asteroid
+in its path and each asteroid is broken by the first shot to reach it.
+The differences:
+- each game holds at most `max_asteroids` asteroids and `max_shots` shots,
+  spawns and fragments that don't fit are dropped
+- fragments of an asteroid that hit the ship can only be shot from the
+  next step on (in the game, from the step they were made)
+- random numbers come from np.random.default_rng(seed), not from the
+  per-world streams of rng.py, so a seed plays a different game here than
+  in headless.py
+
+Needs NumPy.
+
+    python vecenv.py --envs 256 --steps 2000   # measure steps per second
+"""
+import numpy as np
+from constants import *
+
+KEY_LEFT = 1
+KEY_RIGHT = 2
+KEY_FORWARD = 4
+KEY_BACK = 8
+KEY_SHOOT = 16
+
+SHIP_FEATURES = 7      # x, y, sin, cos of rotation, shot cooldown, invulnerability, lives
+ASTEROID_FEATURES = 5  # dx, dy, vx, vy, radius of one of the nearest asteroids
+
+# Spawn points and directions of AsteroidField.edges: (direction, start, position along the edge)
+EDGE_DIRECTIONS = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)], dtype=float)
+EDGE_STARTS = np.array([
+    (-ASTEROID_MAX_RADIUS, 0),
+    (SCREEN_WIDTH + ASTEROID_MAX_RADIUS, 0),
+    (0, -ASTEROID_MAX_RADIUS),
+    (0, SCREEN_HEIGHT + ASTEROID_MAX_RADIUS),
+], dtype=float)
+EDGE_SPANS = np.array([(0, SCREEN_HEIGHT), (0, SCREEN_HEIGHT), (SCREEN_WIDTH, 0), (SCREEN_WIDTH, 0)], dtype=float)
+
+SCREEN_SIZE = np.array([SCREEN_WIDTH, SCREEN_HEIGHT], dtype=float)
+
+
+def forward(degrees):
+    """pygame.Vector2(0, 1).rotate(degrees) for an array of angles, shape (..., 2)"""
+    radians = np.radians(degrees)
+    return np.stack((-np.sin(radians), np.cos(radians)), axis=-1)
+
+
+def rotate(vectors, degrees):
+    """pygame's Vector2.rotate for arrays of vectors and angles"""
+    radians = np.radians(degrees)
+    cos = np.cos(radians)
+    sin = np.sin(radians)
+    x = vectors[..., 0]
+    y = vectors[..., 1]
+    return np.stack((x * cos - y * sin, x * sin + y * cos), axis=-1)
+
+
+def wrap(positions):
+    """Asteroid and Player wrapping: leaving one side puts you on the opposite edge"""
+    for axis, size in enumerate((SCREEN_WIDTH, SCREEN_HEIGHT)):
+        coordinate = positions[..., axis]
+        coordinate[coordinate < 0] = size
+        coordinate[coordinate > size] = 0
+
+
+def motion_start(start, end, existed=None):
+    """CircleShape.motion's start: where a body was before the step, its end
+    position when it wrapped around the screen or (where `existed` is False)
+    was only made during the step"""
+    teleported = (np.abs(end - start) > SCREEN_SIZE / 2).any(axis=-1)
+    if existed is not None:
+        teleported |= ~existed
+    return np.where(teleported[..., None], end, start)
+
+
+def sweep_times(ox, oy, rx, ry, reach):
+    """circleshape.sweep_time over arrays, given the x and y parts of offset and relative
+
+    Returns the first time in 0..1 the circles touch, np.inf where they don't.
+    """
+    c = ox * ox + oy * oy - reach * reach
+    a = rx * rx + ry * ry
+    b = ox * rx + oy * ry
+    discriminant = b * b - a * c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (-b - np.sqrt(discriminant)) / a
+    t = np.where((discriminant >= 0) & (a > 0) & (t >= 0) & (t <= 1), t, np.inf)
+    return np.where(c < 0, 0.0, t)  # already touching at the start
+
+
+def first_free(used):
+    """Index of the first free slot in each row and whether there was one"""
+    free = ~used
+    return free.argmax(axis=1), free.any(axis=1)
+
+
+def used_slots(used):
+    """Number of leading slots that hold something in at least one row"""
+    columns = np.flatnonzero(used.any(axis=0))
+    return columns[-1] + 1 if len(columns) else 0
+
+
+class VecEnv:
+    """`num_envs` games in lockstep, see the module docstring"""
+    destroy_reward = 1.0   # per asteroid broken by a shot
+    life_reward = -10.0    # per life lost
+    step_reward = 0.0      # per step survived
+
+    def __init__(self, num_envs, dt=1 / 60, max_steps=3600, max_asteroids=128, max_shots=16,
+                 nearest=8, seed=None):
+        self.num_envs = num_envs
+        self.dt = dt
+        self.max_steps = max_steps
+        self.nearest = nearest
+        self.rng = np.random.default_rng(seed)
+        self.observation_size = SHIP_FEATURES + nearest * ASTEROID_FEATURES
+        k = num_envs
+
+        # Player
+        self.ship_position = np.zeros((k, 2))
+        self.ship_rotation = np.zeros(k)
+        self.shot_cooldown = np.zeros(k)
+        self.invulnerable = np.zeros(k)
+        self.lives = np.zeros(k, dtype=np.int64)
+        # AsteroidField
+        self.spawn_timer = np.zeros(k)
+        # Asteroids, a radius of 0 marks a free slot
+        self.asteroid_position = np.zeros((k, max_asteroids, 2))
+        self.asteroid_velocity = np.zeros((k, max_asteroids, 2))
+        self.asteroid_radius = np.zeros((k, max_asteroids))
+        # Shots
+        self.shot_position = np.zeros((k, max_shots, 2))
+        self.shot_velocity = np.zeros((k, max_shots, 2))
+        self.shot_alive = np.zeros((k, max_shots), dtype=bool)
+        # Episode bookkeeping
+        self.steps = np.zeros(k, dtype=np.int64)
+        self.asteroids_destroyed = np.zeros(k, dtype=np.int64)
+        self.rows = np.arange(k)
+
+    def reset(self):
+        """Start a new game in every env, returns the observations"""
+        self.reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.observe()
+
+    def reset_envs(self, mask):
+        """Start a new game in the envs where `mask` is True"""
+        self.ship_position[mask] = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        self.ship_rotation[mask] = 0
+        self.shot_cooldown[mask] = 0
+        self.invulnerable[mask] = 0
+        self.lives[mask] = 3
+        self.spawn_timer[mask] = 0
+        self.asteroid_radius[mask] = 0
+        self.shot_alive[mask] = False
+        self.steps[mask] = 0
+        self.asteroids_destroyed[mask] = 0
+
+    def step(self, actions):
+        """Advance every game by one step of dt with the held keys in `actions`
+
+        Returns (observations, rewards, terminated, truncated, info). Games
+        that ended are reset before returning, so their observation is the
+        first one of the next game; the info dict has the episode length,
+        asteroids destroyed and lives of every game as it was at the end
+        of this step.
+        """
+        actions = np.asarray(actions)
+        dt = self.dt
+        rewards = np.full(self.num_envs, self.step_reward)
+
+        # Where everything was before the step (World.save_previous_positions)
+        ship_start = self.ship_position.copy()
+        asteroid_start = self.asteroid_position.copy()
+        asteroid_existed = self.asteroid_radius > 0
+        shot_start = self.shot_position.copy()
+
+        # Asteroid.update and Shot.update, for the bodies that existed before this step
+        self.asteroid_position += self.asteroid_velocity * dt
+        wrap(self.asteroid_position)
+        self.shot_position += self.shot_velocity * dt
+        outside = ((self.shot_position < 0) | (self.shot_position > SCREEN_SIZE)).any(axis=2)
+        self.shot_alive &= ~outside
+        shot_existed = self.shot_alive.copy()  # new shots may take the slots of the ones that left
+
+        self.update_ships(actions, dt)
+        self.spawn_asteroids(dt)
+
+        # The swept motions, new bodies and wrap-arounds don't move (CircleShape.motion).
+        # Only the slot ranges in use anywhere are tested, most of the arrays are empty.
+        alive = self.asteroid_radius > 0
+        asteroids = used_slots(alive)
+        shots = used_slots(self.shot_alive)
+        ship_start = motion_start(ship_start, self.ship_position)
+        asteroid_start = motion_start(asteroid_start[:, :asteroids], self.asteroid_position[:, :asteroids],
+                                      asteroid_existed[:, :asteroids])
+        shot_start = motion_start(shot_start[:, :shots], self.shot_position[:, :shots], shot_existed[:, :shots])
+
+        # World.check_player_collisions: the earliest hit only, then the ship is invulnerable
+        ship_motion = self.ship_position - ship_start
+        asteroid_motion = self.asteroid_position[:, :asteroids] - asteroid_start
+        offset = ship_start[:, None] - asteroid_start
+        relative = ship_motion[:, None] - asteroid_motion
+        times = sweep_times(offset[..., 0], offset[..., 1], relative[..., 0], relative[..., 1],
+                            PLAYER_RADIUS + self.asteroid_radius[:, :asteroids])
+        times[~(alive[:, :asteroids] & (self.invulnerable <= 0)[:, None])] = np.inf
+        hit = np.isfinite(times).any(axis=1)
+        self.lives -= hit
+        self.invulnerable[hit] = 3.0
+        rewards += hit * self.life_reward
+        broken = np.zeros_like(alive)
+        if hit.any():
+            broken[self.rows[hit], times[hit].argmin(axis=1)] = True
+        terminated = self.lives <= 0
+
+        # World.check_shot_collisions, skipped in games that just ended like in the game loop
+        shot_motion = self.shot_position[:, :shots] - shot_start
+        offset_x = shot_start[:, :, None, 0] - asteroid_start[:, None, :, 0]
+        offset_y = shot_start[:, :, None, 1] - asteroid_start[:, None, :, 1]
+        relative_x = shot_motion[:, :, None, 0] - asteroid_motion[:, None, :, 0]
+        relative_y = shot_motion[:, :, None, 1] - asteroid_motion[:, None, :, 1]
+        times = sweep_times(offset_x, offset_y, relative_x, relative_y,
+                            SHOT_RADIUS + self.asteroid_radius[:, None, :asteroids])
+        candidates = self.shot_alive[:, :shots, None] & (alive & ~broken)[:, None, :asteroids]
+        candidates &= ~terminated[:, None, None]
+        times[~candidates] = np.inf
+        shot_hits = np.zeros_like(alive)
+        # The game takes hits in time order. A pair that is both the shot's earliest
+        # hit and the asteroid's earliest hit would be taken there too, so take
+        # those, drop their shots and asteroids and repeat until none are left.
+        while shots and asteroids:
+            first_asteroid = times.argmin(axis=2)
+            first_shot = times.argmin(axis=1)
+            rows, shot = np.nonzero(np.isfinite(np.take_along_axis(times, first_asteroid[..., None], 2)[..., 0]))
+            asteroid = first_asteroid[rows, shot]
+            mutual = first_shot[rows, asteroid] == shot
+            if not mutual.any():
+                break
+            rows, shot, asteroid = rows[mutual], shot[mutual], asteroid[mutual]
+            shot_hits[rows, asteroid] = True
+            self.shot_alive[rows, shot] = False
+            times[rows, shot, :] = np.inf
+            times[rows, :, asteroid] = np.inf
+        destroyed = shot_hits.sum(axis=1)
+        self.asteroids_destroyed += destroyed
+        rewards += destroyed * self.destroy_reward
+        self.split(broken | shot_hits)
+
+        self.steps += 1
+        truncated = ~terminated & (self.steps >= self.max_steps)
+        info = {
+            "steps": self.steps.copy(),
+            "asteroids_destroyed": self.asteroids_destroyed.copy(),
+            "lives": self.lives.copy(),
+        }
+        done = terminated | truncated
+        if done.any():
+            self.reset_envs(done)
+        return self.observe(), rewards, terminated, truncated, info
+
+    def update_ships(self, actions, dt):
+        """Player.update for every ship"""
+        self.shot_cooldown[self.shot_cooldown > 0] -= dt
+        self.invulnerable[self.invulnerable > 0] -= dt
+
+        turn = PLAYER_TURN_SPEED * dt
+        self.ship_rotation = (self.ship_rotation - turn * ((actions & KEY_LEFT) > 0)) % 360
+        self.ship_rotation = (self.ship_rotation + turn * ((actions & KEY_RIGHT) > 0)) % 360
+        heading = forward(self.ship_rotation)
+        for key, sign in ((KEY_FORWARD, 1), (KEY_BACK, -1)):
+            moving = (actions & key) > 0
+            self.ship_position += heading * (sign * PLAYER_SPEED * dt * moving)[:, None]
+            wrap(self.ship_position)
+
+        # Player.shoot: a new shot at the tip of the ship
+        shooting = ((actions & KEY_SHOOT) > 0) & (self.shot_cooldown <= 0)
+        slot, has_room = first_free(self.shot_alive)
+        rows = self.rows[shooting & has_room]
+        slot = slot[rows]
+        self.shot_position[rows, slot] = self.ship_position[rows] + heading[rows] * PLAYER_RADIUS
+        self.shot_velocity[rows, slot] = heading[rows] * PLAYER_SHOT_SPEED
+        self.shot_alive[rows, slot] = True
+        self.shot_cooldown[shooting] = 0.3
+
+    def spawn_asteroids(self, dt):
+        """AsteroidField.spawn_due for every game, one spawn every ASTEROID_SPAWN_RATE seconds"""
+        self.spawn_timer += dt
+        spawning = self.spawn_timer >= ASTEROID_SPAWN_RATE - 1e-9
+        self.spawn_timer[spawning] -= ASTEROID_SPAWN_RATE  # keep the remainder, as the timer wheel does
+        slot, has_room = first_free(self.asteroid_radius > 0)
+        rows = self.rows[spawning & has_room]
+        count = len(rows)
+        if not count:
+            return
+        rng = self.rng
+        edge = rng.integers(0, 4, count)
+        speed = rng.integers(40, 101, count)
+        angle = rng.integers(-30, 31, count)
+        along = rng.uniform(0, 1, count)
+        kind = rng.integers(1, ASTEROID_KINDS + 1, count)
+        slot = slot[rows]
+        self.asteroid_position[rows, slot] = EDGE_STARTS[edge] + EDGE_SPANS[edge] * along[:, None]
+        self.asteroid_velocity[rows, slot] = rotate(EDGE_DIRECTIONS[edge] * speed[:, None], angle)
+        self.asteroid_radius[rows, slot] = ASTEROID_MIN_RADIUS * kind
+
+    def split(self, broken):
+        """Asteroid.split for every asteroid in the `broken` mask"""
+        radius = self.asteroid_radius
+        parents = broken & (radius > ASTEROID_MIN_RADIUS)
+        rows, columns = np.nonzero(parents)
+        position = self.asteroid_position[rows, columns]
+        velocity = self.asteroid_velocity[rows, columns]
+        new_radius = radius[rows, columns] // 2
+        angle = self.rng.uniform(20, 50, len(rows))
+        radius[broken] = 0
+
+        # Fragments go into the free slots of their game, in slot order
+        rank = (np.cumsum(parents, axis=1) - 1)[rows, columns]
+        free_slots = np.argsort(radius > 0, axis=1, kind="stable")
+        free_count = (radius == 0).sum(axis=1)
+        for child, sign in ((0, 1), (1, -1)):
+            index = rank * 2 + child
+            fits = index < free_count[rows]
+            slot = free_slots[rows[fits], index[fits]]
+            self.asteroid_position[rows[fits], slot] = position[fits]
+            self.asteroid_velocity[rows[fits], slot] = rotate(velocity[fits], sign * angle[fits]) * 1.2
+            radius[rows[fits], slot] = new_radius[fits]
+
+    def observe(self):
+        """Observation rows: the ship, then the `nearest` closest asteroids (zeros if fewer)"""
+        observations = np.zeros((self.num_envs, self.observation_size), dtype=np.float32)
+        radians = np.radians(self.ship_rotation)
+        observations[:, 0:2] = self.ship_position / SCREEN_SIZE
+        observations[:, 2] = np.sin(radians)
+        observations[:, 3] = np.cos(radians)
+        observations[:, 4] = self.shot_cooldown
+        observations[:, 5] = self.invulnerable
+        observations[:, 6] = self.lives
+
+        if self.nearest:
+            offset = self.asteroid_position - self.ship_position[:, None]
+            distance = np.where(self.asteroid_radius > 0, np.einsum("kai,kai->ka", offset, offset), np.inf)
+            order = np.argsort(distance, axis=1)[:, :self.nearest]
+            rows = self.rows[:, None]
+            present = np.isfinite(distance[rows, order])[..., None]
+            features = np.concatenate((
+                offset[rows, order] / SCREEN_SIZE,
+                self.asteroid_velocity[rows, order] / PLAYER_SPEED,
+                self.asteroid_radius[rows, order, None] / ASTEROID_MAX_RADIUS,
+            ), axis=2) * present
+            observations[:, SHIP_FEATURES:] = features.reshape(self.num_envs, -1)
+        return observations
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Step a batch of games with random actions")
+    parser.add_argument("--envs", type=int, default=256, help="games stepped together")
+    parser.add_argument("--steps", type=int, default=2000, help="steps to run")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    env = VecEnv(args.envs, seed=args.seed)
+    env.reset()
+    rng = np.random.default_rng(args.seed)
+    actions = rng.integers(0, 32, (args.steps, args.envs))
+    episodes = 0
+    start = time.perf_counter()
+    for step in range(args.steps):
+        observations, rewards, terminated, truncated, info = env.step(actions[step])
+        episodes += int(terminated.sum() + truncated.sum())
+    elapsed = time.perf_counter() - start
+    print(f"{args.envs * args.steps / elapsed:.0f} env steps/s ({args.steps / elapsed:.0f} batched steps/s), "
+          f"{episodes} episodes finished")
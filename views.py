@@ -0,0 +1,20 @@
+"""Immutable views of the asteroids, shots and ship in a frame, for the Snapshots of pipeline.py"""
+import collections
+
+
+class CircleView(collections.namedtuple("CircleView", "x y radius color width")):
+    """An asteroid or shot as it is drawn"""
+    __slots__ = ()
+
+    def blit_item(self, cache, alpha=1.0):
+        surface, offset = cache.circle(self.color, self.radius, self.width)
+        return surface, (int(self.x * cache.scale) - offset, int(self.y * cache.scale) - offset)
+
+
+class ShipView(collections.namedtuple("ShipView", "x y rotation")):
+    """The player's ship as it is drawn"""
+    __slots__ = ()
+
+    def blit_item(self, cache, alpha=1.0):
+        surface, offset = cache.ship(self.rotation)
+        return surface, (int(self.x * cache.scale) - offset, int(self.y * cache.scale) - offset)
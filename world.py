@@ -0,0 +1,258 @@
+import math
+import os
+from constants import *
+from player import Player
+from asteroid import Asteroid
+from asteroidfield import AsteroidField
+from shot import Shot
+from spatialhash import SpatialHash
+from circleshape import CircleShape, sweep_time
+from registry import Entity, Registry
+from rng import Stream
+from timers import TimerWheel
+import physics
+from pool import Pool
+import log
+import audio
+import scores
+
+# Optional NumPy backend: asteroids and shots become views over shared arrays
+# and are all moved by one PhysicsKernel instead of their own update()
+use_numpy_physics = USE_NUMPY_PHYSICS and physics.np is not None
+
+# Reuse killed asteroids and shots instead of allocating new sprites, one pool per class
+for cls in (Asteroid, Shot) + ((physics.ArrayAsteroid, physics.ArrayShot) if physics.np is not None else ()):
+    cls.pool = Pool(cls)
+# The pools of the classes worlds use by default
+asteroid_pool = (physics.ArrayAsteroid if use_numpy_physics else Asteroid).pool
+shot_pool = (physics.ArrayShot if use_numpy_physics else Shot).pool
+
+
+class World:
+    """The entities and simulation step of one game
+
+    New entities join the registry of the active world (the one whose
+    activate() was called last), so several worlds can live in one process
+    as long as only one of them is stepped at a time. `numpy_physics`
+    picks the backend, USE_NUMPY_PHYSICS by default.
+    """
+    def __init__(self, numpy_physics=None):
+        self.registry = Registry()
+        if numpy_physics is None:
+            numpy_physics = use_numpy_physics
+        # Live views of the registry, iterated by the loops below and in main.py
+        if numpy_physics:
+            # Asteroids and shots are moved by the kernel
+            self.updatable = self.registry.query(physics.PhysicsKernel, Player)
+        else:
+            self.updatable = self.registry.query(Player, Asteroid, Shot)
+        self.drawable = self.registry.query(CircleShape)
+        self.players = self.registry.query(Player)
+        self.asteroids = self.registry.query(Asteroid)
+        self.shots = self.registry.query(Shot)
+        self.grid = SpatialHash()  # broadphase for asteroid collisions, rebuilt every step
+        self.profiler = None       # FrameProfiler to report phase timings to
+        self.physics_kernel = None
+        self.asteroids_destroyed = 0  # asteroids hit by shots
+        self.asteroid_travel = 0      # farthest any asteroid moved in the last step
+        # One random stream per subsystem, see rng.py
+        self.seed = 0
+        self.step = 0                 # simulation steps since reset(), the streams' step
+        self.spawner_rng = Stream("spawner")
+        self.splitter_rng = Stream("splitter")
+        # Spawns, cooldowns and the like are callbacks on simulation time, see timers.py
+        self.time = 0.0               # simulation seconds since reset()
+        self.timers = TimerWheel()
+        if numpy_physics:
+            self.activate()
+            self.physics_kernel = physics.PhysicsKernel()
+            self.activate()  # again, for the kernel's arrays and body classes
+
+    def activate(self):
+        """Make new entities join this world's registry"""
+        Entity.registry = self.registry
+        Entity.timers = self.timers
+        AsteroidField.rng = self.spawner_rng
+        Asteroid.rng = self.splitter_rng
+        if self.physics_kernel:
+            AsteroidField.asteroid_type = physics.ArrayAsteroid
+            Player.shot_type = physics.ArrayShot
+            physics.ArrayAsteroid.arrays = self.physics_kernel.asteroids
+            physics.ArrayShot.arrays = self.physics_kernel.shots
+        else:
+            AsteroidField.asteroid_type = Asteroid
+            Player.shot_type = Shot
+
+    def clear(self):
+        """Kill every asteroid and shot (back to their pools) and empty the registry"""
+        for entity in list(self.asteroids) + list(self.shots):
+            entity.kill()
+
+        # The player, asteroid field and kernel go too, reset() adds them back
+        self.registry.clear()
+        if self.physics_kernel:
+            self.physics_kernel.clear()
+
+    def reset(self, player, asteroid_field, seed=None):
+        """Start a new game with just the player and asteroid field
+
+        `player` can be None for worlds whose players join later (see net.py).
+        The same seed (and inputs) give the same game, None picks a new one.
+        """
+        self.activate()
+        self.clear()
+        self.asteroids_destroyed = 0
+        self.asteroid_travel = 0
+        self.seed = seed if seed is not None else int.from_bytes(os.urandom(8), "little")
+        self.step = 0
+        for stream in (self.spawner_rng, self.splitter_rng):
+            stream.seed(self.seed)
+        self.time = 0.0
+        self.timers.clear()
+
+        # Re-add the kernel, player and asteroid field. The kernel is updated
+        # first, so new bodies start moving the step after they were created.
+        if self.physics_kernel:
+            self.registry.add(self.physics_kernel)
+        if player:
+            self.registry.add(player)
+        self.registry.add(asteroid_field)
+        asteroid_field.start()
+
+    def save_previous_positions(self):
+        """Remember where everything was before the next simulation step, for interpolation"""
+        if self.physics_kernel:
+            # Asteroids and shots in one array copy, only the players one by one
+            self.physics_kernel.save_previous()
+            for player in self.players:
+                player.save_previous()
+        else:
+            for obj in self.drawable:
+                obj.save_previous()
+
+    def move(self, dt):
+        """Update every object by dt seconds and rebuild the collision grid"""
+        self.save_previous_positions()  # start of every sweep, and of the interpolation
+        self.step += 1
+        self.spawner_rng.begin_step(self.step)
+        self.splitter_rng.begin_step(self.step)
+
+        # Update all objects
+        for obj in self.updatable:
+            obj.update(dt)  # Update things
+        # Then whatever came due, so new asteroids start moving next step as with the kernel
+        self.advance_timers(dt)
+
+        # Bucket the asteroids so collision checks only look at nearby cells
+        self.rebuild_grid()
+        self.measure_travel(dt)
+
+    def rebuild_grid(self):
+        if self.physics_kernel:
+            # Cells from the kernel's arrays, in the registry's order like rebuild()
+            asteroids = list(self.asteroids)
+            arrays = self.physics_kernel.asteroids
+            max_radius = arrays.radii[:len(arrays)].max().item() if asteroids else 0
+            self.grid.rebuild_cells(asteroids, arrays.cells(asteroids, self.grid.cell_size), max_radius)
+        else:
+            self.grid.rebuild(self.asteroids)
+
+    def measure_travel(self, dt):
+        """How far the fastest asteroid gets in dt, the slack the swept collision queries add"""
+        if self.physics_kernel:
+            self.asteroid_travel = self.physics_kernel.asteroids.max_speed() * dt
+        else:
+            self.asteroid_travel = max((asteroid.velocity.length() for asteroid in self.asteroids), default=0) * dt
+
+    def advance_timers(self, dt):
+        self.time += dt
+        self.timers.advance(self.time)
+
+    def update(self, player, dt):
+        """Advance the simulation by dt seconds, returns True when the game is over"""
+        profiler = self.profiler
+        self.move(dt)
+        if profiler:
+            profiler.lap("update")
+
+        game_over = self.check_player_collisions(player)
+        if profiler:
+            profiler.lap("player_collisions")
+        if game_over:
+            return True
+
+        self.check_shot_collisions()
+        if profiler:
+            profiler.lap("shot_collisions")
+
+        return False
+
+    def swept_candidates(self, obj):
+        """Asteroids that may have touched obj anywhere along the last step"""
+        start, end = obj.motion()
+        reach = obj.radius + start.distance_to(end) / 2 + self.asteroid_travel
+        return self.grid.query((start + end) / 2, reach)
+
+    def check_player_collisions(self, player):
+        """Split the first asteroid that hit the player, returns True when that was the last life"""
+        # Swept test, so the earliest contact in the step counts (there is only
+        # one, the player is invulnerable right after a hit)
+        hits = []
+        for order, asteroid in enumerate(self.swept_candidates(player)):
+            time = player.time_of_impact(asteroid)
+            if time is not None:
+                hits.append((time, order, asteroid))
+        if not hits:
+            return False
+
+        _, _, asteroid = min(hits, key=lambda hit: hit[:2])
+        # Player loses a life when colliding with an asteroid
+        if player.lose_life():
+            return True
+        # Destroy the asteroid that hit the player
+        self.grid.remove(asteroid)
+        for fragment in asteroid.split():
+            self.grid.insert(fragment)
+        return False
+
+    def check_shot_collisions(self):
+        """Kill shots that hit an asteroid and split the asteroids they hit
+
+        Shots and asteroids are swept over the step and contacts are handled
+        in time order, so each shot breaks the first asteroid in its path
+        and each asteroid is broken by the first shot to reach it. Fragments
+        can be hit from the next step on.
+        """
+        grid = self.grid
+        hits = []
+        motions = {}  # asteroid -> (start, displacement, radius), each asteroid is a candidate of several shots
+        for shot in self.shots:
+            start, end = shot.motion()
+            displacement = end - start
+            radius = shot.radius
+            reach = radius + displacement.length() / 2 + self.asteroid_travel
+            for asteroid in grid.query((start + end) / 2, reach):
+                motion = motions.get(asteroid)
+                if motion is None:
+                    asteroid_start, asteroid_end = asteroid.motion()
+                    motion = motions[asteroid] = (asteroid_start, asteroid_end - asteroid_start, asteroid.radius)
+                time = sweep_time(start - motion[0], displacement - motion[1], radius + motion[2])
+                if time is not None:
+                    hits.append((time, len(hits), shot, asteroid))
+        hits.sort(key=lambda hit: hit[:2])
+
+        broken = set()
+        for _, _, shot, asteroid in hits:
+            if asteroid in broken or not shot.alive():
+                continue
+            broken.add(asteroid)
+            shot.kill()
+            # Call the split method instead of just killing the asteroid
+            grid.remove(asteroid)
+            for fragment in asteroid.split():
+                grid.insert(fragment)
+            self.asteroids_destroyed += 1
+            # Several breaks in one frame are merged into one sound by audio.flush()
+            audio.post(audio.ROCK_BREAK)
+            scores.post(scores.ASTEROID_SPLIT, math.ceil(asteroid.radius / ASTEROID_MIN_RADIUS))  # size, 1 to ASTEROID_KINDS
+            log.debug("Shot hit asteroid!")